@@ -1,78 +1,50 @@
 # ai_client.py
 
 import os
+import asyncio
+import random
+import threading
+import concurrent.futures
+from collections import OrderedDict
 from dotenv import load_dotenv
 import pandas as pd
-from openai import OpenAI
-from qdrant_client import QdrantClient
-from qdrant_client.http import models as rest
-from qdrant_client.http.exceptions import UnexpectedResponse
+from openai import OpenAI, AsyncOpenAI, RateLimitError, APITimeoutError
+from vector_store import make_store
+from prompts import build_ad_messages
 
 # 1) Load environment
 load_dotenv()
 API_KEY = os.getenv("OPENAI_API_KEY")
-QDRANT_URL = os.getenv("QDRANT_URL")
-QDRANT_API_KEY = os.getenv("QDRANT_API_KEY", None)
 
 if not API_KEY:
     raise ValueError("Missing OPENAI_API_KEY in environment")
-if not QDRANT_URL:
-    raise ValueError("Missing QDRANT_URL in environment")
 
-# 2) Instantiate clients
+# 2) Instantiate clients; the vector store is Qdrant (QDRANT_URL) or the
+#    local in-process index, per VECTOR_BACKEND, built on first search so
+#    importing this module (e.g. from generate_embeddings) needs no store
 _client = OpenAI(api_key=API_KEY)
-_qdrant = QdrantClient(
-    url=QDRANT_URL,
-    api_key=QDRANT_API_KEY,
-)
-
-PROMPT_TEMPLATES = {
-    "Upcoming Match": {
-        "system": (
-            "You are the world’s top-tier social media strategist for polo events. "
-            "Your job is to craft high-converting Instagram ads that build excitement and drive viewer engagement."
-        ),
-        "user": (
-            "Using the following match details:\n{info}\n"
-            "Create a compelling Instagram ad caption that captures the energy of the upcoming game. "
-            "Make it visually engaging, emotionally resonant, and optimized to stop the scroll. "
-            "Include a sense of urgency, key match details, and a call to watch or follow."
-        ),
-    },
-    "Lesson": {
-        "system": (
-            "You are a high-converting Instagram ad copywriter specializing in sports education. "
-            "Your goal is to drive sign-ups and spark interest in polo training content."
-        ),
-        "user": (
-            "Given the following lesson details:\n{info}\n"
-            "Write an Instagram ad caption that highlights what the lesson teaches, why it matters, and who it's for. "
-            "Use a confident tone, include benefits, and end with a clear call to action (e.g., 'Watch now', 'Master your next move')."
-        ),
-    },
-    "Course": {
-        "system": (
-            "You are a results-driven digital marketer focused on promoting online sports courses. "
-            "Your specialty is writing irresistible Instagram captions that boost enrollment."
-        ),
-        "user": (
-            "Based on this course information:\n{info}\n"
-            "Write an Instagram ad that makes the course feel essential for anyone looking to level up their polo skills. "
-            "Highlight outcomes, target audience, and create FOMO with urgency cues (e.g., 'Limited spots', 'Enroll now')."
-        ),
-    },
-    "Article": {
-        "system": (
-            "You are a social media content strategist for a leading polo media brand. "
-            "You excel at turning long-form content into short, click-worthy Instagram captions."
-        ),
-        "user": (
-            "Using the article info below:\n{info}\n"
-            "Write a teaser Instagram caption that hooks attention, hints at the value of the article, and encourages followers to click the link or visit the site to read more. "
-            "Use emotion, curiosity, or controversy if applicable."
-        ),
-    },
-}
+_store  = None
+_store_lock = threading.Lock()
+
+def get_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = make_store()
+        return _store
+
+# 3) Async client, driven by one long-lived background event loop so
+#    its connection pool survives across Streamlit reruns
+_aclient = AsyncOpenAI(api_key=API_KEY)
+_loop = asyncio.new_event_loop()
+threading.Thread(target=_loop.run_forever, name="ai_client-loop", daemon=True).start()
+
+def run_async(coro):
+    """
+    Run a coroutine on the shared client loop and block until it finishes.
+    Safe to call from the Streamlit script thread.
+    """
+    return asyncio.run_coroutine_threadsafe(coro, _loop).result()
 
 def generate_ad_copy(
     info: dict,
@@ -84,23 +56,14 @@ def generate_ad_copy(
     Given a dict of row data and a category (one of TAB_LABELS),
     call OpenAI to produce tailored Instagram ad copy.
     """
-    if category not in PROMPT_TEMPLATES:
-        raise ValueError(f"Unknown category: {category}")
-
-    tpl = PROMPT_TEMPLATES[category]
-    system_prompt = tpl["system"]
-    user_prompt   = tpl["user"].format(info=info)
-
     resp = _client.chat.completions.create(
         model=model,
-        messages=[
-            {"role": "system",  "content": system_prompt},
-            {"role": "user",    "content": user_prompt},
-        ],
+        messages=build_ad_messages(info, category),
         temperature=temperature,
     )
     return resp.choices[0].message.content
 
+
 def chat_conversation(
     messages: list[dict],
     model: str = "gpt-4o",
@@ -119,23 +82,56 @@ def chat_conversation(
 
 # ——— Embedding utilities ———
 
+EMBED_CACHE_SIZE = 1024
+
+_embed_cache: OrderedDict[tuple[str, str], list[float]] = OrderedDict()
+_embed_lock = threading.Lock()
+
+def _normalize(text: str) -> str:
+    return " ".join(text.split())
+
+def _cached_embedding(model: str, text: str) -> list[float] | None:
+    with _embed_lock:
+        vec = _embed_cache.get((model, text))
+        if vec is not None:
+            _embed_cache.move_to_end((model, text))
+        return vec
+
+def _store_embedding(model: str, text: str, vec: list[float]) -> None:
+    with _embed_lock:
+        _embed_cache[(model, text)] = vec
+        _embed_cache.move_to_end((model, text))
+        while len(_embed_cache) > EMBED_CACHE_SIZE:
+            _embed_cache.popitem(last=False)
+
 def embed_text(text: str, model: str = "text-embedding-3-small") -> list[float]:
-    resp = _client.embeddings.create(model=model, input=[text])
-    return resp.data[0].embedding
+    """
+    Embed a query, served from an in-process LRU keyed on
+    (model, whitespace-normalized text).
+    """
+    text = _normalize(text)
+    vec = _cached_embedding(model, text)
+    if vec is None:
+        resp = _client.embeddings.create(model=model, input=[text])
+        vec = resp.data[0].embedding
+        _store_embedding(model, text, vec)
+    return vec
+
+def embed_texts(texts: list[str], model: str = "text-embedding-3-small") -> list[list[float]]:
+    """
+    Embed many texts in one request (bypasses the query cache).
+    Returns the vectors in input order.
+    """
+    resp = _client.embeddings.create(model=model, input=texts)
+    return [d.embedding for d in sorted(resp.data, key=lambda d: d.index)]
 
 def get_best_matching_row(category: str, prompt: str, top_k: int = 1) -> pd.DataFrame:
     """
-    Your existing Qdrant search—it returns a DataFrame of payload rows (or empty).
+    Your existing vector search—it returns a DataFrame of payload rows (or empty).
     """
     collection = category.lower().replace(" ", "_")
     vec        = embed_text(prompt)
-    hits       = _qdrant.search(
-        collection_name=collection,
-        query_vector=vec,
-        limit=top_k,
-        with_payload=True
-    )
-    rows = [hit.payload for hit in hits]
+    rows       = get_store().search(collection, vec, limit=top_k)
     return pd.DataFrame(rows) if rows else pd.DataFrame()
 
 # ─── New: row description helper ────────────────────────────────────────────
@@ -184,4 +180,116 @@ def get_best_match_with_description(
         return df, ""
     # describe only the first match
     description = describe_row(df.iloc[0], model=desc_model, temperature=desc_temp)
-    return df, description
\ No newline at end of file
+    return df, description
+
+# ─── Async client path ──────────────────────────────────────────────────────
+async def asearch_collection(category: str, vec: list[float], top_k: int = 1) -> pd.DataFrame:
+    """
+    Vector search of one category's collection with a precomputed vector.
+    """
+    collection = category.lower().replace(" ", "_")
+    rows       = await get_store().asearch(collection, vec, limit=top_k)
+    return pd.DataFrame(rows) if rows else pd.DataFrame()
+
+
+def search_collections(
+    categories: list[str],
+    vec: list[float],
+    top_k: int = 1
+) -> dict[str, pd.DataFrame]:
+    """
+    Query every category collection with one vector, concurrently.
+    Returns {category: DataFrame}.
+    """
+    async def _gather():
+        return await asyncio.gather(
+            *(asearch_collection(c, vec, top_k) for c in categories)
+        )
+    return dict(zip(categories, run_async(_gather())))
+
+
+async def agenerate_ad_copy(
+    info: dict,
+    category: str,
+    model: str = "gpt-4o",
+    temperature: float = 0.7
+) -> str:
+    resp = await _aclient.chat.completions.create(
+        model=model,
+        messages=build_ad_messages(info, category),
+        temperature=temperature,
+    )
+    return resp.choices[0].message.content
+
+
+def get_best_matching_rows(
+    categories: list[str],
+    prompt: str,
+    top_k: int = 1
+) -> dict[str, pd.DataFrame]:
+    """
+    Best matches for every category: the prompt is embedded once and
+    the vector is searched against all collections concurrently, so a
+    four-category lookup takes about as long as one.
+    Returns {category: DataFrame}.
+    """
+    return search_collections(categories, embed_text(prompt), top_k)
+
+
+# ─── Batch generation ───────────────────────────────────────────────────────
+async def _agenerate_with_retry(
+    info: dict,
+    category: str,
+    sem: asyncio.Semaphore,
+    max_retries: int,
+    model: str,
+    temperature: float
+) -> str:
+    async with sem:
+        for attempt in range(max_retries + 1):
+            try:
+                return await agenerate_ad_copy(info, category, model, temperature)
+            except (RateLimitError, APITimeoutError):
+                if attempt == max_retries:
+                    raise
+                # exponential backoff with jitter, capped at 30s
+                await asyncio.sleep(min(2 ** attempt, 30) + random.random())
+
+
+def submit_ad_batch(
+    df: pd.DataFrame,
+    category: str,
+    max_concurrency: int = 8,
+    max_retries: int = 5,
+    model: str = "gpt-4o",
+    temperature: float = 0.7
+) -> tuple[concurrent.futures.Future, dict]:
+    """
+    Start generating ad copy for every row of `df` in the background,
+    with at most `max_concurrency` requests in flight and backoff on
+    rate limits.
+    Returns (future, progress): progress["done"] counts finished rows;
+    the future resolves to `df` plus "Ad Copy" and "Error" columns.
+    """
+    progress = {"done": 0, "total": len(df)}
+    infos = [row.to_dict() for _, row in df.iterrows()]
+
+    async def _one(info, sem):
+        try:
+            return await _agenerate_with_retry(
+                info, category, sem, max_retries, model, temperature
+            ), ""
+        except Exception as e:
+            return "", str(e)
+        finally:
+            progress["done"] += 1
+
+    async def _run():
+        sem = asyncio.Semaphore(max_concurrency)
+        results = await asyncio.gather(*(_one(info, sem) for info in infos))
+        out = df.copy()
+        out["Ad Copy"] = [copy for copy, _ in results]
+        out["Error"]   = [err for _, err in results]
+        return out
+
+    return asyncio.run_coroutine_threadsafe(_run(), _loop), progress
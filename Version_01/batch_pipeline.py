@@ -0,0 +1,180 @@
+# batch_pipeline.py
+"""
+Offline bulk ad generation through the OpenAI Batch API.
+
+    python batch_pipeline.py build   [-c Lesson ...]   # write the JSONL batch file
+    python batch_pipeline.py submit  batch/ads.jsonl   # upload + create the batch
+    python batch_pipeline.py collect <batch_id>        # poll, download, merge
+    python batch_pipeline.py run     [-c Lesson ...]   # all three in one go
+
+Prompts are the same PROMPT_TEMPLATES messages generate_ad_copy sends.
+Each request's custom_id is "<collection>:<row_index>", and results are
+merged back into the source rows as one CSV per category with
+"Ad Copy" and "Error" columns.
+
+For local runs, start ``python batch_stub_server.py`` and point the
+client at it with ``--base-url http://127.0.0.1:8765/v1`` (or
+OPENAI_BASE_URL); any OPENAI_API_KEY value is accepted there.
+"""
+import os
+import json
+import time
+import argparse
+
+from dotenv import load_dotenv
+from openai import OpenAI
+
+from config import FILENAME_MAP
+from data_store import load_dataset
+from prompts import build_ad_messages
+
+BASE_DIR  = os.path.dirname(os.path.abspath(__file__))
+BATCH_DIR = os.path.join(BASE_DIR, "batch")
+
+MODEL              = "gpt-4o"
+TEMPERATURE        = 0.7
+ENDPOINT           = "/v1/chat/completions"
+MAX_REQUESTS       = 50_000  # Batch API limit per input file
+POLL_INTERVAL      = 30
+TERMINAL_STATUSES  = ("completed", "failed", "expired", "cancelled")
+
+
+def collection_name(category: str) -> str:
+    return category.lower().replace(" ", "_")
+
+
+def build_batch_file(categories: list[str], path: str) -> int:
+    """
+    Write one chat-completion request per dataset row to `path`.
+    Returns the number of requests.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    n = 0
+    with open(path, "w", encoding="utf-8") as f:
+        for category in categories:
+            df = load_dataset(category)
+            for idx, row in df.iterrows():
+                request = {
+                    "custom_id": f"{collection_name(category)}:{idx}",
+                    "method":    "POST",
+                    "url":       ENDPOINT,
+                    "body": {
+                        "model":       MODEL,
+                        "temperature": TEMPERATURE,
+                        "messages":    build_ad_messages(row.to_dict(), category),
+                    },
+                }
+                f.write(json.dumps(request, ensure_ascii=False, default=str) + "\n")
+                n += 1
+    if n > MAX_REQUESTS:
+        raise ValueError(f"{n} requests exceed the {MAX_REQUESTS} per-batch limit; use -c to split.")
+    return n
+
+
+def submit_batch(client: OpenAI, path: str) -> str:
+    with open(path, "rb") as f:
+        batch_file = client.files.create(file=f, purpose="batch")
+    batch = client.batches.create(
+        input_file_id=batch_file.id,
+        endpoint=ENDPOINT,
+        completion_window="24h",
+    )
+    return batch.id
+
+
+def wait_for_batch(client: OpenAI, batch_id: str, interval: float = POLL_INTERVAL):
+    while True:
+        batch = client.batches.retrieve(batch_id)
+        counts = batch.request_counts
+        if counts is not None:
+            print(f"   {batch.status}: {counts.completed}/{counts.total} done, {counts.failed} failed")
+        else:
+            print(f"   {batch.status}")
+        if batch.status in TERMINAL_STATUSES:
+            return batch
+        time.sleep(interval)
+
+
+def _read_jsonl(client: OpenAI, file_id: str | None) -> list[dict]:
+    if not file_id:
+        return []
+    text = client.files.content(file_id).text
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+def merge_results(client: OpenAI, batch, out_dir: str = BATCH_DIR) -> list[str]:
+    """
+    Merge the batch output back into the source rows by custom_id.
+    Writes one CSV per category and returns their paths.
+    """
+    copies, errors = {}, {}
+    for item in _read_jsonl(client, batch.output_file_id) + _read_jsonl(client, batch.error_file_id):
+        cid  = item["custom_id"]
+        resp = item.get("response") or {}
+        if item.get("error") or resp.get("status_code") != 200:
+            errors[cid] = json.dumps(item.get("error") or resp.get("body"), ensure_ascii=False)
+        else:
+            copies[cid] = resp["body"]["choices"][0]["message"]["content"]
+
+    os.makedirs(out_dir, exist_ok=True)
+    written = []
+    for category in FILENAME_MAP:
+        prefix = collection_name(category) + ":"
+        if not any(cid.startswith(prefix) for cid in list(copies) + list(errors)):
+            continue
+        df = load_dataset(category).copy()
+        ids = [f"{prefix}{idx}" for idx in df.index]
+        df["Ad Copy"] = [copies.get(cid, "") for cid in ids]
+        df["Error"]   = [errors.get(cid, "" if cid in copies else "missing") for cid in ids]
+        path = os.path.join(out_dir, f"ads_{collection_name(category)}.csv")
+        df.to_csv(path, index=False)
+        written.append(path)
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk ad generation via the OpenAI Batch API.")
+    parser.add_argument("--base-url", default=None,
+                        help="API base URL (e.g. the local stub server)")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    for name in ("build", "run"):
+        p = sub.add_parser(name)
+        p.add_argument("-c", "--category", action="append", choices=list(FILENAME_MAP),
+                       help="category to include (repeatable; default: all)")
+        p.add_argument("--out", default=os.path.join(BATCH_DIR, "ads.jsonl"))
+    p = sub.add_parser("submit")
+    p.add_argument("path")
+    p = sub.add_parser("collect")
+    p.add_argument("batch_id")
+    p.add_argument("--out-dir", default=BATCH_DIR, help="where the merged CSVs go")
+    for p in sub.choices.values():
+        p.add_argument("--poll", type=float, default=POLL_INTERVAL, help="seconds between polls")
+    args = parser.parse_args(argv)
+
+    load_dotenv()
+    client = OpenAI(base_url=args.base_url) if args.base_url else OpenAI()
+
+    if args.cmd in ("build", "run"):
+        n = build_batch_file(args.category or list(FILENAME_MAP), args.out)
+        print(f"📝 Wrote {n} request(s) to {args.out}")
+        if args.cmd == "build":
+            return
+        args.path = args.out
+        args.out_dir = os.path.dirname(os.path.abspath(args.out))  # CSVs next to the JSONL
+
+    if args.cmd in ("submit", "run"):
+        args.batch_id = submit_batch(client, args.path)
+        print(f"🚀 Submitted batch {args.batch_id}")
+        if args.cmd == "submit":
+            return
+
+    batch = wait_for_batch(client, args.batch_id, args.poll)
+    if batch.status != "completed":
+        print(f"⚠️ Batch ended as '{batch.status}'; merging whatever finished.")
+    for path in merge_results(client, batch, args.out_dir):
+        print(f"✅ {path}")
+
+
+if __name__ == "__main__":
+    main()
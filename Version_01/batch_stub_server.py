@@ -0,0 +1,182 @@
+# batch_stub_server.py
+"""
+Local stand-in for the parts of the OpenAI API the batch pipeline uses:
+
+    POST /v1/files                  upload (multipart, purpose=batch)
+    GET  /v1/files/{id}/content     download
+    POST /v1/batches                create; completes after --delay seconds
+    GET  /v1/batches/{id}           status
+    POST /v1/chat/completions       canned single completion
+
+Every chat completion answers with a deterministic stub caption, so
+the pipeline can be run and timed end to end without an API key.
+
+    python batch_stub_server.py --port 8765 --delay 2
+"""
+import json
+import time
+import argparse
+import threading
+from email.parser import BytesParser
+from email.policy import default as default_policy
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+_files: dict[str, dict] = {}
+_batches: dict[str, dict] = {}
+_lock = threading.Lock()
+_counter = 0
+
+
+def _new_id(prefix: str) -> str:
+    global _counter
+    with _lock:
+        _counter += 1
+        return f"{prefix}{_counter}"
+
+
+def _completion(body: dict, tag: str) -> dict:
+    user = next((m["content"] for m in reversed(body.get("messages", [])) if m["role"] == "user"), "")
+    return {
+        "id":      _new_id("chatcmpl-stub-"),
+        "object":  "chat.completion",
+        "created": int(time.time()),
+        "model":   body.get("model", "stub"),
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": f"🏇 [stub ad for {tag}] {user[:80]}"},
+            "finish_reason": "stop",
+        }],
+        "usage": {"prompt_tokens": len(user) // 4, "completion_tokens": 20,
+                  "total_tokens": len(user) // 4 + 20},
+    }
+
+
+def _store_file(data: bytes, filename: str, purpose: str) -> dict:
+    meta = {
+        "id":         _new_id("file-"),
+        "object":     "file",
+        "bytes":      len(data),
+        "created_at": int(time.time()),
+        "filename":   filename,
+        "purpose":    purpose,
+        "status":     "processed",
+    }
+    with _lock:
+        _files[meta["id"]] = {"meta": meta, "data": data}
+    return meta
+
+
+def _run_batch(batch_id: str, delay: float) -> None:
+    time.sleep(delay)
+    with _lock:
+        batch = _batches[batch_id]
+        data = _files[batch["input_file_id"]]["data"]
+
+    out_lines = []
+    for line in data.decode("utf-8").splitlines():
+        if not line.strip():
+            continue
+        req = json.loads(line)
+        out_lines.append(json.dumps({
+            "id":        _new_id("batch_req_"),
+            "custom_id": req["custom_id"],
+            "response":  {"status_code": 200, "request_id": _new_id("req_"),
+                          "body": _completion(req["body"], req["custom_id"])},
+            "error":     None,
+        }, ensure_ascii=False))
+
+    out = _store_file("\n".join(out_lines).encode("utf-8"), f"{batch_id}_output.jsonl", "batch_output")
+    with _lock:
+        batch.update({
+            "status":         "completed",
+            "output_file_id": out["id"],
+            "completed_at":   int(time.time()),
+            "request_counts": {"total": len(out_lines), "completed": len(out_lines), "failed": 0},
+        })
+
+
+class Handler(BaseHTTPRequestHandler):
+    delay = 2.0
+
+    def _send(self, status: int, payload, raw: bool = False):
+        body = payload if raw else json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/octet-stream" if raw else "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _body(self) -> bytes:
+        return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+    def do_POST(self):
+        path = self.path.split("?")[0].rstrip("/")
+        if path == "/v1/files":
+            head = f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode()
+            msg = BytesParser(policy=default_policy).parsebytes(head + self._body())
+            fields, data, filename = {}, b"", "upload.jsonl"
+            for part in msg.iter_parts():
+                name = part.get_param("name", header="content-disposition")
+                if name == "file":
+                    data, filename = part.get_payload(decode=True), part.get_filename() or filename
+                else:
+                    fields[name] = part.get_content().strip()
+            return self._send(200, _store_file(data, filename, fields.get("purpose", "batch")))
+
+        if path == "/v1/batches":
+            req = json.loads(self._body())
+            if req.get("input_file_id") not in _files:
+                return self._send(404, {"error": {"message": "input file not found"}})
+            batch = {
+                "id":                _new_id("batch_"),
+                "object":            "batch",
+                "endpoint":          req["endpoint"],
+                "input_file_id":     req["input_file_id"],
+                "completion_window": req.get("completion_window", "24h"),
+                "status":            "in_progress",
+                "created_at":        int(time.time()),
+                "output_file_id":    None,
+                "error_file_id":     None,
+                "request_counts":    {"total": 0, "completed": 0, "failed": 0},
+            }
+            with _lock:
+                _batches[batch["id"]] = batch
+            threading.Thread(target=_run_batch, args=(batch["id"], self.delay), daemon=True).start()
+            return self._send(200, batch)
+
+        if path == "/v1/chat/completions":
+            return self._send(200, _completion(json.loads(self._body()), "chat"))
+
+        self._send(404, {"error": {"message": f"unknown route {path}"}})
+
+    def do_GET(self):
+        parts = self.path.split("?")[0].strip("/").split("/")
+        with _lock:
+            if parts[:2] == ["v1", "batches"] and len(parts) == 3 and parts[2] in _batches:
+                return self._send(200, dict(_batches[parts[2]]))
+            if parts[:2] == ["v1", "files"] and len(parts) == 4 and parts[3] == "content" and parts[2] in _files:
+                return self._send(200, _files[parts[2]]["data"], raw=True)
+            if parts[:2] == ["v1", "files"] and len(parts) == 3 and parts[2] in _files:
+                return self._send(200, _files[parts[2]]["meta"])
+        self._send(404, {"error": {"message": f"not found: {self.path}"}})
+
+    def log_message(self, fmt, *args):
+        pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local OpenAI Batch API stand-in.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--delay", type=float, default=2.0,
+                        help="seconds before a batch completes")
+    args = parser.parse_args(argv)
+
+    Handler.delay = args.delay
+    server = ThreadingHTTPServer((args.host, args.port), Handler)
+    print(f"Stub OpenAI API on http://{args.host}:{args.port}/v1")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+# data_store.py
+"""
+Shared dataset layer for the Excel files in FILENAME_MAP.
+
+Each ``.xlsx`` is parsed once and written to an Arrow IPC (Feather) file
+under ``data/.cache``, named after the source's mtime and size so a
+changed workbook is re-converted automatically. Later loads read the
+memory-mapped Arrow file instead of parsing Excel, and the resulting
+DataFrames are kept in one process-wide instance shared by every mode,
+session and rerun. Treat them as read-only.
+"""
+import os
+import glob
+import threading
+
+import pandas as pd
+
+from config import FILENAME_MAP
+
+try:
+    from pyarrow import feather
+except ImportError:  # optional: keep only the in-process cache
+    feather = None
+
+# Compute project & data paths
+BASE_DIR  = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR  = os.path.join(BASE_DIR, "data")
+CACHE_DIR = os.path.join(DATA_DIR, ".cache")
+
+_frames: dict[str, tuple[tuple[int, int], pd.DataFrame]] = {}
+_lock = threading.Lock()
+
+
+def _signature(path: str) -> tuple[int, int]:
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
+def _arrow_safe(df: pd.DataFrame) -> pd.DataFrame:
+    # Excel columns mixing numbers and text (e.g. a Handicap of 4 or
+    # "TBC") can't be stored as one Arrow type: keep them as text.
+    for col in df.columns:
+        if df[col].dtype == object:
+            kinds = {type(v) for v in df[col].dropna()}
+            if len(kinds) > 1:
+                df[col] = df[col].map(lambda v: v if pd.isna(v) else str(v))
+    return df
+
+
+def _read_columnar(path: str, sig: tuple[int, int]) -> pd.DataFrame:
+    stem = os.path.splitext(os.path.basename(path))[0]
+    cache_path = os.path.join(CACHE_DIR, f"{stem}.{sig[0]}-{sig[1]}.arrow")
+
+    if feather is not None and os.path.exists(cache_path):
+        return feather.read_table(cache_path, memory_map=True).to_pandas()
+
+    df = _arrow_safe(pd.read_excel(path))
+    if feather is not None:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        for stale in glob.glob(os.path.join(CACHE_DIR, f"{stem}.*.arrow")):
+            os.remove(stale)
+        try:
+            feather.write_feather(df, cache_path + ".tmp")
+            os.replace(cache_path + ".tmp", cache_path)
+        except Exception:
+            # anything Arrow still can't encode: fall back to Excel
+            # on the next cold start
+            if os.path.exists(cache_path + ".tmp"):
+                os.remove(cache_path + ".tmp")
+    return df
+
+
+def load_dataset(label: str) -> pd.DataFrame:
+    """
+    The DataFrame for one tab label, from the shared instance when the
+    source file is unchanged.
+    """
+    if label not in FILENAME_MAP:
+        raise KeyError(f"No filename mapped for “{label}”.")
+    path = os.path.join(DATA_DIR, FILENAME_MAP[label])
+    sig = _signature(path)
+
+    with _lock:
+        hit = _frames.get(label)
+        if hit is not None and hit[0] == sig:
+            return hit[1]
+        df = _read_columnar(path, sig)
+        _frames[label] = (sig, df)
+        return df
+
+
+def load_all() -> dict[str, pd.DataFrame]:
+    return {label: load_dataset(label) for label in FILENAME_MAP}
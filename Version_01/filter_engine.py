@@ -0,0 +1,95 @@
+# filter_engine.py
+"""
+Indexed exact-match filtering for filter_mode.
+
+Each column is factorized once into integer codes over its sorted
+string values. A selection (column == value) becomes a cached boolean
+row bitmap, and both the faceted option lists and the filtered rows are
+computed from bitmap intersections instead of copying and re-masking
+the DataFrame per column.
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+
+BITMAP_CACHE_SIZE = 4096
+
+
+class FilterIndex:
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        self._codes  = {}  # col -> int codes per row (-1 = null)
+        self._values = {}  # col -> sorted distinct string values
+        self._lookup = {}  # col -> {value: code}
+        self._bitmaps = {}
+        self._lock = threading.Lock()
+
+        for col in df.columns:
+            s = df[col]
+            codes, uniques = pd.factorize(s.astype(str).where(s.notna()), sort=True)
+            values = [str(v) for v in uniques]
+            self._codes[col]  = codes
+            self._values[col] = values
+            self._lookup[col] = {v: i for i, v in enumerate(values)}
+
+    def _bitmap(self, col, value: str) -> np.ndarray:
+        key = (col, value)
+        with self._lock:
+            bm = self._bitmaps.get(key)
+        if bm is None:
+            code = self._lookup[col].get(value)
+            if code is None:
+                bm = np.zeros(len(self.df), dtype=bool)
+            else:
+                bm = self._codes[col] == code
+            with self._lock:
+                if len(self._bitmaps) >= BITMAP_CACHE_SIZE:
+                    self._bitmaps.clear()
+                self._bitmaps[key] = bm
+        return bm
+
+    def _mask(self, selections: dict, skip=None) -> np.ndarray | None:
+        mask = None
+        for col, value in selections.items():
+            if col == skip or not value:
+                continue
+            bm = self._bitmap(col, value)
+            mask = bm.copy() if mask is None else np.logical_and(mask, bm, out=mask)
+        return mask
+
+    def options(self, col, selections: dict) -> list[str]:
+        """
+        Values of `col` still present once every *other* selection is
+        applied, sorted.
+        """
+        values = self._values[col]
+        mask = self._mask(selections, skip=col)
+        if mask is None:
+            return list(values)
+        codes = self._codes[col][mask]
+        present = np.bincount(codes[codes >= 0], minlength=len(values)) > 0
+        return [v for v, keep in zip(values, present) if keep]
+
+    def apply(self, selections: dict) -> pd.DataFrame:
+        mask = self._mask(selections)
+        if mask is None:
+            return self.df
+        return self.df.iloc[np.flatnonzero(mask)]
+
+
+_indexes: dict[str, FilterIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def index_for(name: str, df: pd.DataFrame) -> FilterIndex:
+    """
+    Process-wide FilterIndex for a dataset, rebuilt when the DataFrame
+    instance changes (e.g. after data_store reloads a modified file).
+    """
+    with _indexes_lock:
+        idx = _indexes.get(name)
+        if idx is None or idx.df is not df:
+            idx = FilterIndex(df)
+            _indexes[name] = idx
+        return idx
@@ -1,126 +1,157 @@
-# import os
-
-# # 👇 Qdrant Cloud endpoint (no surrounding quotes!)
-# os.environ["QDRANT_URL"]     = "qdrant_url_here"
-# os.environ["QDRANT_API_KEY"] = "qdrant_api_key_here"
-
-# # 👇 Your OpenAI key
-# os.environ["OPENAI_API_KEY"] = "api_key_here"
-
-# from qdrant_client import QdrantClient
-
-# qdrant = QdrantClient(
-#     url=os.environ["QDRANT_URL"],
-#     api_key=os.environ["QDRANT_API_KEY"],
-# )
-
-# # This should print a list (possibly empty) of your collections:
-# print(qdrant.get_collections().collections)                              
-
-# # generate_embeddings_qdrant.py
-
-# import os
-# import pandas as pd
-# from dotenv import load_dotenv
-# from openai import OpenAI
-# from qdrant_client import QdrantClient
-# from qdrant_client.models import PointStruct, Distance
-
-# # Map each tab to its Excel filename
-# FILENAME_MAP = {
-#     "Upcoming Match": "df_schedule.xlsx",
-#     "Lesson":         "df_lessons.xlsx",
-#     "Course":         "df_courses.xlsx",
-#     "Article":        "df_article_schedule.xlsx",
-# }
-
-# # Compute project & data paths
-# DATA_DIR     = os.path.join('./streamlit_app', "data")
-
-# def main():
-#     # ─── Load API keys ─────────────────────────────────────────────────────────
-#     load_dotenv()
-#     API_KEY = os.getenv("OPENAI_API_KEY")
-#     if not API_KEY:
-#         raise ValueError("Missing OPENAI_API_KEY in environment")
-
-#     openai_client = OpenAI(api_key=API_KEY)
-#     qdrant        = QdrantClient(
-#         url=os.getenv("QDRANT_URL", "http://localhost:6333"),
-#         api_key=os.getenv("QDRANT_API_KEY", None),
-#     )
-
-#     # ─── Embedding settings ────────────────────────────────────────────────────
-#     EMBEDDING_MODEL = "text-embedding-3-small"
-#     VECTOR_SIZE     = 1536
-#     DISTANCE        = Distance.COSINE
-#     BATCH_SIZE      = 64
-
-#     for category, fname in FILENAME_MAP.items():
-#         # Ask user whether to process this category
-#         ans = input(f"\nProcess embeddings for category '{category}' (file '{fname}')? [y/n]: ").strip().lower()
-#         if ans not in ("y", "yes"):
-#             print(f"→ Skipping '{category}'.")
-#             continue
-
-#         collection = category.lower().replace(" ", "_")
-#         df = pd.read_excel(os.path.join(DATA_DIR, fname))
-
-#         # Ensure collection exists
-#         if not qdrant.collection_exists(collection):
-#             qdrant.create_collection(
-#                 collection_name=collection,
-#                 vectors_config={"size": VECTOR_SIZE, "distance": DISTANCE},
-#             )
-
-#         # Fetch existing IDs to skip already-processed rows
-#         points_list, _ = qdrant.scroll(
-#             collection_name=collection,
-#             limit=df.shape[0],
-#             with_payload=False
-#         )
-#         existing_ids = {pt.id for pt in points_list}
-#         print(f"→ Collection '{collection}' has {len(existing_ids)} rows already indexed.")
-
-#         batch = []
-#         for idx, row in df.iterrows():
-#             if idx in existing_ids:
-#                 continue
-
-#             # Print progress
-#             print(f"Processing row index: {idx}")
-
-#             # a) Generate description
-#             desc = describe_row(openai_client, row)
-
-#             # b) Embed description
-#             emb = openai_client.embeddings.create(
-#                 model=EMBEDDING_MODEL,
-#                 input=[desc],
-#             ).data[0].embedding
-
-#             # c) Prepare payload
-#             payload = row.to_dict()
-#             payload.update({
-#                 "category":    category,
-#                 "row_index":   int(idx),
-#                 "description": desc,
-#             })
-
-#             batch.append(PointStruct(id=idx, vector=emb, payload=payload))
-
-#             # d) Flush batch
-#             if len(batch) >= BATCH_SIZE:
-#                 qdrant.upsert(collection_name=collection, points=batch)
-#                 batch.clear()
-
-#         # Flush any remaining points
-#         if batch:
-#             qdrant.upsert(collection_name=collection, points=batch)
-
-#         print(f"✅ Indexed new rows into '{collection}'")
-
-#     print("🎉 Done!")
-
-
-# main()
\ No newline at end of file
+# generate_embeddings.py
+"""
+Index the category datasets into the vector store.
+
+    python generate_embeddings.py                    # every category
+    python generate_embeddings.py -c Lesson -c Article
+    python generate_embeddings.py --force            # ignore the checkpoint
+    python generate_embeddings.py --backend local    # in-process index files
+
+Rows are described with the LLM (bounded concurrency), embedded in
+batches, and staged in the store, which is flushed every FLUSH_ROWS
+rows. A checkpoint of per-row content hashes is written after every
+flush, so an interrupted run resumes where it stopped and unchanged
+rows are skipped on re-runs.
+"""
+import os
+import json
+import hashlib
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+from dotenv import load_dotenv
+
+from config import FILENAME_MAP
+from ai_client import describe_row, embed_texts
+from vector_store import make_store
+
+# Compute project & data paths
+BASE_DIR        = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR        = os.path.join(BASE_DIR, "data")
+CHECKPOINT_PATH = os.path.join(DATA_DIR, ".index_checkpoint_{backend}.json")
+
+# ─── Embedding settings ──────────────────────────────────────────────────────
+EMBEDDING_MODEL = "text-embedding-3-small"
+VECTOR_SIZE     = 1536
+BATCH_SIZE      = 64
+WORKERS         = 8
+FLUSH_ROWS      = 2_000  # rows staged between store flushes / checkpoints
+
+
+def row_payload(row: pd.Series) -> dict:
+    # JSON round-trip turns Timestamps/NaN into plain values
+    return json.loads(row.to_json(date_format="iso"))
+
+
+def content_hash(payload: dict) -> str:
+    blob = json.dumps(payload, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(blob.encode("utf-8")).hexdigest()
+
+
+def load_checkpoint(path: str) -> dict:
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    return {}
+
+
+def save_checkpoint(checkpoint: dict, path: str) -> None:
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp, path)
+
+
+def index_category(
+    store,
+    category: str,
+    fname: str,
+    checkpoint: dict,
+    checkpoint_path: str,
+    workers: int,
+    batch_size: int,
+) -> int:
+    collection = category.lower().replace(" ", "_")
+    df = pd.read_excel(os.path.join(DATA_DIR, fname))
+
+    # Ensure collection exists
+    store.ensure_collection(collection, VECTOR_SIZE)
+
+    done = checkpoint.setdefault(collection, {})
+    todo = []
+    for idx, row in df.iterrows():
+        payload = row_payload(row)
+        h = content_hash(payload)
+        if done.get(str(idx)) != h:
+            todo.append((int(idx), row, payload, h))
+
+    print(f"→ '{collection}': {len(df) - len(todo)} up to date, {len(todo)} to index.")
+
+    staged = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for start in range(0, len(todo), batch_size):
+            batch = todo[start : start + batch_size]
+
+            # a) Describe rows concurrently, b) embed them in one request
+            descs = list(pool.map(lambda item: describe_row(item[1]), batch))
+            vecs  = embed_texts(descs, model=EMBEDDING_MODEL)
+
+            # c) Stage the upsert
+            payloads = []
+            for (idx, _, payload, h), desc in zip(batch, descs):
+                payload.update({
+                    "category":     category,
+                    "row_index":    idx,
+                    "description":  desc,
+                    "content_hash": h,
+                })
+                payloads.append(payload)
+            store.upsert(collection, [item[0] for item in batch], vecs, payloads, flush=False)
+            staged += batch
+
+            # d) Write the collection once per FLUSH_ROWS rows, then
+            #    checkpoint only what has been written
+            finished = start + batch_size >= len(todo)
+            if len(staged) >= FLUSH_ROWS or finished:
+                store.flush(collection)
+                for idx, _, _, h in staged:
+                    done[str(idx)] = h
+                save_checkpoint(checkpoint, checkpoint_path)
+                staged = []
+            print(f"   {min(start + batch_size, len(todo))}/{len(todo)}")
+
+    return len(todo)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Index category datasets into the vector store.")
+    parser.add_argument("-c", "--category", action="append", choices=list(FILENAME_MAP),
+                        help="category to index (repeatable; default: all)")
+    parser.add_argument("--force", action="store_true",
+                        help="re-index every row, ignoring the checkpoint")
+    parser.add_argument("--workers", type=int, default=WORKERS,
+                        help="concurrent description requests")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE,
+                        help="rows per embedding request / upsert")
+    parser.add_argument("--backend", choices=("qdrant", "local"),
+                        default=os.getenv("VECTOR_BACKEND", "qdrant"),
+                        help="vector store to write to (default: $VECTOR_BACKEND or qdrant)")
+    args = parser.parse_args(argv)
+
+    load_dotenv()
+    store = make_store(args.backend)
+
+    checkpoint_path = CHECKPOINT_PATH.format(backend=args.backend)
+    checkpoint = {} if args.force else load_checkpoint(checkpoint_path)
+    for category in args.category or list(FILENAME_MAP):
+        n = index_category(
+            store, category, FILENAME_MAP[category],
+            checkpoint, checkpoint_path, args.workers, args.batch_size,
+        )
+        print(f"✅ Indexed {n} row(s) into '{category}'")
+    print("🎉 Done!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+# modes/batch_mode.py
+import time
+import streamlit as st
+
+from ai_client import submit_ad_batch
+
+MAX_CONCURRENCY = 8
+
+
+def render_batch_generation(df, label: str):
+    """
+    Generate ad copy for every row of the (filtered) DataFrame at once,
+    with live progress, and keep the results for export.
+    """
+    results_key = f"batch_results_{label}"
+
+    with st.expander(f"📦 Batch generate ads for all {len(df)} filtered rows", expanded=False):
+        concurrency = st.slider(
+            "Max requests in flight", 1, 32, MAX_CONCURRENCY, key=f"batch_conc_{label}"
+        )
+        if st.button("Generate All Ads", key=f"batch_gen_{label}"):
+            future, progress = submit_ad_batch(df, label, max_concurrency=concurrency)
+            bar = st.progress(0.0, text="Starting…")
+            while not future.done():
+                done = progress["done"]
+                bar.progress(done / max(progress["total"], 1), text=f"{done}/{progress['total']} ads")
+                time.sleep(0.25)
+            bar.progress(1.0, text=f"{progress['total']}/{progress['total']} ads")
+            st.session_state[results_key] = future.result()
+
+        results = st.session_state.get(results_key)
+        if results is not None:
+            failed = int((results["Error"] != "").sum())
+            if failed:
+                st.warning(f"{failed} row(s) failed; see the Error column.")
+            st.dataframe(results, use_container_width=True)
+            st.download_button(
+                "⬇️ Download CSV",
+                results.to_csv(index=False).encode("utf-8"),
+                file_name=f"ads_{label.replace(' ', '_').lower()}.csv",
+                mime="text/csv",
+                key=f"batch_dl_{label}",
+            )
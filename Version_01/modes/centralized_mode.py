@@ -9,10 +9,11 @@ import ai_client
 from ai_client import (
     generate_ad_copy,
     chat_conversation,
-    PROMPT_TEMPLATES,
-    get_best_matching_row
+    get_best_matching_rows
 )
+from prompts import PROMPT_TEMPLATES
 from utils import init_history
+from data_store import load_dataset
 from config import (
     DEFAULT_MATCH_TEXT,
     DEFAULT_LESSON_TEXT,
@@ -32,9 +33,8 @@ def run_centralized_mode():
     # 1) Load all dataframes once
     dfs = {}
     for label, fname in FILENAME_MAP.items():
-        path = os.path.join(DATA_DIR, fname)
         try:
-            dfs[label] = pd.read_excel(path)
+            dfs[label] = load_dataset(label)
         except Exception as e:
             st.error(f"Failed to load `{fname}`: {e}")
             return
@@ -47,10 +47,10 @@ def run_centralized_mode():
     prompt = st.chat_input("Type a query to find relevant rows across all categories…", key="central_input")
     if prompt:
         st.session_state[hist_key].append({"role": "user", "content": prompt})
-        # 4) For each category, retrieve its best-matching row
+        # 4) For each category, retrieve its best-matching row (concurrently)
         st.session_state["central_best_rows"] = {}
-        for label, df in dfs.items():
-            best_df = get_best_matching_row(label, prompt, top_k=1)
+        best_dfs = get_best_matching_rows(list(dfs), prompt, top_k=1)
+        for label, best_df in best_dfs.items():
             if not best_df.empty:
                 info = best_df.iloc[0].to_dict()
                 st.session_state["central_best_rows"][label] = info
@@ -0,0 +1,70 @@
+# prompts.py
+"""
+Per-category ad prompts. Import-safe (no clients, no env): shared by
+ai_client and the offline batch pipeline.
+"""
+
+PROMPT_TEMPLATES = {
+    "Upcoming Match": {
+        "system": (
+            "You are the world’s top-tier social media strategist for polo events. "
+            "Your job is to craft high-converting Instagram ads that build excitement and drive viewer engagement."
+        ),
+        "user": (
+            "Using the following match details:\n{info}\n"
+            "Create a compelling Instagram ad caption that captures the energy of the upcoming game. "
+            "Make it visually engaging, emotionally resonant, and optimized to stop the scroll. "
+            "Include a sense of urgency, key match details, and a call to watch or follow."
+        ),
+    },
+    "Lesson": {
+        "system": (
+            "You are a high-converting Instagram ad copywriter specializing in sports education. "
+            "Your goal is to drive sign-ups and spark interest in polo training content."
+        ),
+        "user": (
+            "Given the following lesson details:\n{info}\n"
+            "Write an Instagram ad caption that highlights what the lesson teaches, why it matters, and who it's for. "
+            "Use a confident tone, include benefits, and end with a clear call to action (e.g., 'Watch now', 'Master your next move')."
+        ),
+    },
+    "Course": {
+        "system": (
+            "You are a results-driven digital marketer focused on promoting online sports courses. "
+            "Your specialty is writing irresistible Instagram captions that boost enrollment."
+        ),
+        "user": (
+            "Based on this course information:\n{info}\n"
+            "Write an Instagram ad that makes the course feel essential for anyone looking to level up their polo skills. "
+            "Highlight outcomes, target audience, and create FOMO with urgency cues (e.g., 'Limited spots', 'Enroll now')."
+        ),
+    },
+    "Article": {
+        "system": (
+            "You are a social media content strategist for a leading polo media brand. "
+            "You excel at turning long-form content into short, click-worthy Instagram captions."
+        ),
+        "user": (
+            "Using the article info below:\n{info}\n"
+            "Write a teaser Instagram caption that hooks attention, hints at the value of the article, and encourages followers to click the link or visit the site to read more. "
+            "Use emotion, curiosity, or controversy if applicable."
+        ),
+    },
+}
+
+
+def build_ad_messages(info: dict, category: str) -> list[dict]:
+    """
+    The system + user messages for one ad, built from PROMPT_TEMPLATES.
+    """
+    if category not in PROMPT_TEMPLATES:
+        raise ValueError(f"Unknown category: {category}")
+
+    tpl = PROMPT_TEMPLATES[category]
+    system_prompt = tpl["system"]
+    user_prompt   = tpl["user"].format(info=info)
+
+    return [
+        {"role": "system",  "content": system_prompt},
+        {"role": "user",    "content": user_prompt},
+    ]
@@ -8,3 +8,48 @@ def init_history(key: str):
 def generate_dummy_response(user_input: str) -> str:
     # stub for your real API call
     return f"🤖 DummyBot: You said “{user_input}”"
+
+def select_tab(labels: list[str], key: str) -> str:
+    """
+    Tab-like selector. Unlike st.tabs, only the returned label's content
+    needs to be computed, since hidden tabs are never evaluated.
+    """
+    return st.radio("Dataset", labels, horizontal=True, key=key,
+                    label_visibility="collapsed")
+
+def render_paginated_dataframe(df, key: str, page_size: int = 50):
+    """
+    Preview `df` one page at a time. Sorting and slicing happen
+    server-side, so only the visible rows are sent to the browser.
+    """
+    if df.empty:
+        st.dataframe(df, use_container_width=True)
+        return
+
+    n_pages  = max(1, -(-len(df) // page_size))
+    page_key = f"{key}_page"
+    if st.session_state.get(page_key, 1) > n_pages:
+        st.session_state[page_key] = n_pages
+
+    c1, c2, c3 = st.columns([3, 1, 1])
+    sort_col = c1.selectbox(
+        "Sort by", [None] + list(df.columns), key=f"{key}_sort",
+        format_func=lambda c: "(original order)" if c is None else str(c),
+    )
+    descending = c2.checkbox("Descending", key=f"{key}_desc")
+    page = c3.number_input("Page", min_value=1, max_value=n_pages,
+                           value=1, step=1, key=page_key)
+
+    view = df
+    if sort_col is not None:
+        try:
+            view = df.sort_values(sort_col, ascending=not descending,
+                                  kind="stable", na_position="last")
+        except TypeError:  # mixed types: fall back to text order
+            view = df.sort_values(sort_col, ascending=not descending,
+                                  kind="stable", na_position="last",
+                                  key=lambda s: s.astype(str))
+
+    start = (page - 1) * page_size
+    st.dataframe(view.iloc[start : start + page_size], use_container_width=True)
+    st.caption(f"Rows {start + 1}–{min(start + page_size, len(df))} of {len(df)}")
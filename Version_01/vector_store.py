@@ -0,0 +1,209 @@
+# vector_store.py
+"""
+Vector-store backends behind ai_client's search helpers.
+
+- QdrantStore: the Qdrant server (sync + async clients).
+- LocalStore:  an in-process index, one memory-mapped ``.npy`` matrix of
+  L2-normalized embeddings per collection plus a JSON file of payloads
+  that names it; search is a vectorized cosine top-k.
+
+Pick one with ``VECTOR_BACKEND=qdrant|local`` (see make_store).
+"""
+import os
+import json
+import threading
+import time
+
+import numpy as np
+
+BASE_DIR  = os.path.dirname(os.path.abspath(__file__))
+INDEX_DIR = os.path.join(BASE_DIR, "data", "index")
+
+
+class QdrantStore:
+    def __init__(self, url: str, api_key: str | None = None):
+        from qdrant_client import QdrantClient, AsyncQdrantClient
+
+        self.client  = QdrantClient(url=url, api_key=api_key)
+        self.aclient = AsyncQdrantClient(url=url, api_key=api_key)
+
+    def search(self, collection: str, vector: list[float], limit: int = 1) -> list[dict]:
+        hits = self.client.search(
+            collection_name=collection,
+            query_vector=vector,
+            limit=limit,
+            with_payload=True
+        )
+        return [hit.payload for hit in hits]
+
+    async def asearch(self, collection: str, vector: list[float], limit: int = 1) -> list[dict]:
+        hits = await self.aclient.search(
+            collection_name=collection,
+            query_vector=vector,
+            limit=limit,
+            with_payload=True
+        )
+        return [hit.payload for hit in hits]
+
+    def ensure_collection(self, collection: str, size: int) -> None:
+        from qdrant_client.models import Distance
+
+        if not self.client.collection_exists(collection):
+            self.client.create_collection(
+                collection_name=collection,
+                vectors_config={"size": size, "distance": Distance.COSINE},
+            )
+
+    def upsert(
+        self,
+        collection: str,
+        ids: list[int],
+        vectors: list[list[float]],
+        payloads: list[dict],
+        flush: bool = True,
+    ) -> None:
+        from qdrant_client.models import PointStruct
+
+        points = [
+            PointStruct(id=i, vector=v, payload=p)
+            for i, v, p in zip(ids, vectors, payloads)
+        ]
+        self.client.upsert(collection_name=collection, points=points)
+
+    def flush(self, collection: str) -> None:
+        pass  # upserts are written immediately
+
+
+class LocalStore:
+    """
+    Each write produces a new ``<collection>.<generation>.npy`` matrix;
+    ``<collection>.payloads.json`` names the matrix it belongs to and is
+    swapped in last, so a reader always gets ids, payloads and rows from
+    the same write. Upserts are staged in memory until flush(), so a
+    batched index run writes each collection once, not once per batch.
+    """
+    def __init__(self, root: str = INDEX_DIR):
+        self.root     = root
+        self._lock    = threading.Lock()
+        self._cache   = {}  # collection -> (signature, matrix, ids, payloads)
+        self._pending = {}  # collection -> {id: (vector, payload)}
+
+    def _meta_path(self, collection: str) -> str:
+        return os.path.join(self.root, collection + ".payloads.json")
+
+    def _load(self, collection: str):
+        meta_path = self._meta_path(collection)
+        if not os.path.exists(meta_path):
+            return None, [], []
+        st = os.stat(meta_path)
+        sig = (st.st_mtime_ns, st.st_size)
+        with self._lock:
+            hit = self._cache.get(collection)
+            if hit is not None and hit[0] == sig:
+                return hit[1:]
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+            mat_name = meta.get("matrix", collection + ".npy")
+            matrix = np.load(os.path.join(self.root, mat_name), mmap_mode="r")
+            entry = (sig, matrix, meta["ids"], meta["payloads"])
+            self._cache[collection] = entry
+            return entry[1:]
+
+    def search(self, collection: str, vector: list[float], limit: int = 1) -> list[dict]:
+        matrix, _, payloads = self._load(collection)
+        if matrix is None or len(payloads) == 0:
+            return []
+        q = np.asarray(vector, dtype=np.float32)
+        q /= np.linalg.norm(q) or 1.0
+        scores = matrix @ q
+        k = min(limit, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [payloads[i] for i in top]
+
+    async def asearch(self, collection: str, vector: list[float], limit: int = 1) -> list[dict]:
+        return self.search(collection, vector, limit)
+
+    def ensure_collection(self, collection: str, size: int) -> None:
+        os.makedirs(self.root, exist_ok=True)
+
+    def upsert(
+        self,
+        collection: str,
+        ids: list[int],
+        vectors: list[list[float]],
+        payloads: list[dict],
+        flush: bool = True,
+    ) -> None:
+        """
+        Stage rows for `collection`; written now if `flush`, otherwise on
+        the next flush(collection).
+        """
+        with self._lock:
+            rows = self._pending.get(collection)
+        if rows is None:
+            matrix, old_ids, old_payloads = self._load(collection)
+            rows = {} if matrix is None else {
+                i: (np.asarray(matrix[n]), p)
+                for n, (i, p) in enumerate(zip(old_ids, old_payloads))
+            }
+        for i, v, p in zip(ids, vectors, payloads):
+            v = np.asarray(v, dtype=np.float32)
+            rows[i] = (v / (np.linalg.norm(v) or 1.0), p)
+        with self._lock:
+            self._pending[collection] = rows
+        if flush:
+            self.flush(collection)
+
+    def flush(self, collection: str) -> None:
+        with self._lock:
+            rows = self._pending.pop(collection, None)
+        if not rows:
+            return
+
+        all_ids = list(rows)
+        new_matrix = np.stack([rows[i][0] for i in all_ids]).astype(np.float32)
+        mat_name = f"{collection}.{time.time_ns()}.npy"
+        meta = {"matrix": mat_name, "ids": all_ids, "payloads": [rows[i][1] for i in all_ids]}
+
+        # matrix first, then the payload file that points at it
+        os.makedirs(self.root, exist_ok=True)
+        meta_path = self._meta_path(collection)
+        mat_path = os.path.join(self.root, mat_name)
+        with open(mat_path + ".tmp", "wb") as f:
+            np.save(f, new_matrix)
+        os.replace(mat_path + ".tmp", mat_path)
+        previous = None
+        if os.path.exists(meta_path):
+            with open(meta_path, encoding="utf-8") as f:
+                previous = json.load(f).get("matrix", collection + ".npy")
+        with open(meta_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(meta_path + ".tmp", meta_path)
+
+        # keep the previous generation for readers that loaded its
+        # payload file just before the swap; drop anything older
+        keep = {mat_name, previous}
+        prefix = collection + "."
+        for name in os.listdir(self.root):
+            generation = name[len(prefix):-len(".npy")]
+            if name in keep or not name.endswith(".npy"):
+                continue
+            if name == collection + ".npy" or (name.startswith(prefix) and generation.isdigit()):
+                os.remove(os.path.join(self.root, name))
+
+
+def make_store(backend: str | None = None):
+    """
+    Build the configured store: VECTOR_BACKEND=local, or Qdrant
+    (QDRANT_URL required) by default.
+    """
+    backend = (backend or os.getenv("VECTOR_BACKEND", "qdrant")).lower()
+    if backend == "local":
+        return LocalStore()
+    if backend == "qdrant":
+        url = os.getenv("QDRANT_URL")
+        if not url:
+            raise ValueError("Missing QDRANT_URL in environment")
+        return QdrantStore(url=url, api_key=os.getenv("QDRANT_API_KEY", None))
+    raise ValueError(f"Unknown VECTOR_BACKEND: {backend}")
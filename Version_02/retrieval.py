@@ -0,0 +1,62 @@
+# retrieval.py
+import json
+import math
+import re
+from collections import Counter, defaultdict
+from pathlib import Path
+
+_WORD = re.compile(r"\w+")
+
+def _terms(text: str) -> list[str]:
+    return _WORD.findall(text.lower())
+
+
+class BM25Index:
+    """
+    BM25 over whole records of a JSON dump, so a request can carry only
+    the records that match it instead of every chunk of the dataset.
+    """
+    def __init__(self, records: list[dict], k1: float = 1.5, b: float = 0.75):
+        self.k1, self.b = k1, b
+        self.texts = [json.dumps(r, ensure_ascii=False) for r in records]
+        self.lengths = []
+        self.postings = defaultdict(list)  # term -> [(doc, tf)]
+        for doc, text in enumerate(self.texts):
+            terms = _terms(text)
+            self.lengths.append(len(terms))
+            for term, tf in Counter(terms).items():
+                self.postings[term].append((doc, tf))
+
+        n = len(self.texts)
+        self.avg_len = sum(self.lengths) / n if n else 0.0
+        self.idf = {
+            term: math.log(1 + (n - len(p) + 0.5) / (len(p) + 0.5))
+            for term, p in self.postings.items()
+        }
+
+    def select(self, query: str, top_k: int = 40, max_chars: int = 24_000) -> list[str]:
+        """
+        The top-k records for `query` that fit in `max_chars`, returned
+        as one JSON-array chunk (or none when nothing matches).
+        """
+        scores = defaultdict(float)
+        for term, qtf in Counter(_terms(query)).items():
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for doc, tf in self.postings[term]:
+                norm = self.k1 * (1 - self.b + self.b * self.lengths[doc] / self.avg_len)
+                scores[doc] += qtf * idf * tf * (self.k1 + 1) / (tf + norm)
+
+        picked, used = [], 0
+        for doc, _ in sorted(scores.items(), key=lambda s: s[1], reverse=True)[:top_k]:
+            if used + len(self.texts[doc]) <= max_chars:
+                picked.append(doc)
+                used += len(self.texts[doc])
+        if not picked:
+            return []
+        return ["[" + ",\n".join(self.texts[doc] for doc in sorted(picked)) + "]"]
+
+
+def build_index(path: str) -> BM25Index:
+    return BM25Index(json.loads(Path(path).read_text(encoding="utf-8")))
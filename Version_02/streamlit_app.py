@@ -50,23 +50,25 @@ example_chunks = chunk_json(example_posts_json)
 # ─── Session‐state initialization ─────────────────────────────────
 if "base_messages" not in st.session_state:
     # 1) Base system prompts
+    # Stable first so the provider's prompt cache can reuse the prefix:
+    # prompt, examples, then data. The date is added per call, after
+    # the history (see _call_and_record).
     base = [
-        {"role":"system","content":"You are PoloGPT, an expert polo‐social‐media strategist. You know how to craft posts in JSON with keys Platform, Topic, Content."},
-        {"role":"system","content":f"Today is {date.today():%B %d, %Y}."}
+        {"role":"system","content":"You are PoloGPT, an expert polo‐social‐media strategist. You know how to craft posts in JSON with keys Platform, Topic, Content."}
     ]
 
-    # 2) Optionally inject schedule/e‐learning
+    # 2) Optionally inject example posts
+    if USE_EXAMPLES:
+        for c in example_chunks:
+            base.append({"role":"system","content":f"<EXAMPLE_POSTS>\n{c}"})
+
+    # 3) Optionally inject schedule/e‐learning
     if USE_CONTEXT:
         for c in sch_chunks:
             base.append({"role":"system","content":f"<SCHEDULE_DATA>\n{c}"})
         for c in ele_chunks:
             base.append({"role":"system","content":f"<ELEARNING_DATA>\n{c}"})
 
-    # 3) Optionally inject example posts
-    if USE_EXAMPLES:
-        for c in example_chunks:
-            base.append({"role":"system","content":f"<EXAMPLE_POSTS>\n{c}"})
-
     # 4) Store separate histories
     st.session_state.base_messages    = base
     st.session_state.ad_messages      = list(base)
@@ -86,12 +88,9 @@ def initial_send(prompt: str):
     return reply
 
 def modify_ad(prompt: str):
-    # strip out only the example/schedule/e-learning system messages
-    history = [
-        m for m in st.session_state.ad_messages
-        if m["role"]!="system" or not m["content"].startswith(("<SCHEDULE_DATA>","<ELEARNING_DATA>","<EXAMPLE_POSTS>"))
-    ]
-    return _call_and_record(history, prompt, to_hist=st.session_state.ad_messages)
+    # keeps the full system block: stripping chunks out of the middle
+    # breaks the shared prefix, so every call would be a cache miss
+    return _call_and_record(st.session_state.ad_messages, prompt, to_hist=st.session_state.ad_messages)
 
 def modify_content(prompt: str):
     # full history
@@ -99,7 +98,8 @@ def modify_content(prompt: str):
 
 def _call_and_record(history, prompt, to_hist=None):
     with st.spinner("PoloGPT is thinking…"):
-        reply = chat_conversation(history + [{"role":"user","content":prompt}], model="gpt-4.1-mini", token_threshold=TOKEN_THRESHOLD)
+        today = {"role":"system","content":f"Today is {date.today():%B %d, %Y}."}
+        reply = chat_conversation(history + [today, {"role":"user","content":prompt}], model="gpt-4.1-mini", token_threshold=TOKEN_THRESHOLD)
     # record
     if to_hist is None: to_hist = history
     to_hist.append({"role":"user","content":prompt})
@@ -5,10 +5,10 @@ from dotenv import load_dotenv
 import streamlit as st
 from datetime import date
 
-from sheets import load_data
 from example_posts import example_posts_json
 from openai_client import chat_conversation
 from utils import chunk_json
+from retrieval import build_index
 
 # ─── Config & env ────────────────────────────────────────────────
 BASE = Path(__file__).parent
@@ -17,13 +17,20 @@ load_dotenv(BASE / ".env")
 ELEARNING_SOURCE = os.getenv("ELEARNING_SOURCE")
 SCHEDULE_SOURCE  = os.getenv("SCHEDULE_SOURCE")
 TOKEN_THRESHOLD  = 900_000  # effectively disable summarization
+CONTEXT_TOP_K    = 40       # records per source sent with a request
+CONTEXT_MAX_CHARS = 24_000  # ≈ 6k tokens per source
 
 if not ELEARNING_SOURCE or not SCHEDULE_SOURCE:
     st.error("❌ Please set ELEARNING_SOURCE and SCHEDULE_SOURCE in .env")
     st.stop()
 
-# ─── Load & chunk data ────────────────────────────────────────────
-ele_chunks, sch_chunks    = load_data(ELEARNING_SOURCE, SCHEDULE_SOURCE)
+# ─── Load & index data ────────────────────────────────────────────
+@st.cache_resource
+def load_indexes(elearning_source: str, schedule_source: str):
+    # built once per process; each Send retrieves from them
+    return build_index(elearning_source), build_index(schedule_source)
+
+ele_index, sch_index      = load_indexes(ELEARNING_SOURCE, SCHEDULE_SOURCE)
 example_chunks            = chunk_json(example_posts_json)
 
 # ─── Session‐state init ───────────────────────────────────────────
@@ -55,22 +62,27 @@ user_input = st.text_area(
 # Send button
 if st.button("🚀 Send") and user_input.strip():
     # 1) Build system messages
+    #    (stable parts first, so the provider's prompt cache can reuse
+    #    the prefix; the date and retrieved records go last)
     messages = [
-        {"role":"system","content":"You are PoloGPT, an expert polo-social-media strategist. You output JSON posts with keys Platform, Topic, Content."},
-        {"role":"system","content":f"Today is {date.today():%B %d, %Y}."}
+        {"role":"system","content":"You are PoloGPT, an expert polo-social-media strategist. You output JSON posts with keys Platform, Topic, Content."}
     ]
-    # 2) Optionally inject schedule & e-learning context
+    # 2) Always inject example-posts
+    for c in example_chunks:
+        messages.append({"role":"system","content":f"<EXAMPLE_POSTS>\n{c}"})
+    # 3) Append the entire prior history of user/assistant
+    messages.extend(st.session_state.history)
+    # 4) Optionally inject the schedule & e-learning records that match
+    #    this message (BM25, top-k within a size budget)
     if include_context:
+        sch_chunks = sch_index.select(user_input, CONTEXT_TOP_K, CONTEXT_MAX_CHARS)
+        ele_chunks = ele_index.select(user_input, CONTEXT_TOP_K, CONTEXT_MAX_CHARS)
         for c in sch_chunks:
             messages.append({"role":"system","content":f"<SCHEDULE_DATA>\n{c}"})
         for c in ele_chunks:
             messages.append({"role":"system","content":f"<ELEARNING_DATA>\n{c}"})
-    # 3) Always inject example-posts
-    for c in example_chunks:
-        messages.append({"role":"system","content":f"<EXAMPLE_POSTS>\n{c}"})
-    # 4) Append the entire prior history of user/assistant
-    messages.extend(st.session_state.history)
-    # 5) Add the new user turn
+    # 5) Add the date and the new user turn
+    messages.append({"role":"system","content":f"Today is {date.today():%B %d, %Y}."})
     messages.append({"role":"user","content":user_input})
 
     # 6) Call GPT
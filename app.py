@@ -1,10 +1,11 @@
 # app.py (excerpt)
 import streamlit as st
 from context import init_system_messages, build_initial_user_message
-from chat_flow import ask_model
-from ui.chat_ui import chat_interface
-from ui.sheet_ui import sheet_interface
-from config import TOKEN_THRESHOLD
+from chat_flow import ask_model_stream, ask_model_posts_stream
+from ui.chat_ui import chat_interface, usage_caption
+from ui.sheet_ui import sheet_interface, stream_posts_table
+from config import TOKEN_THRESHOLD, USE_RESPONSE_CACHE, STRUCTURED_POSTS
+from posts import POSTS_PER_REPLY
 
 # ─── One-time setup ────────────────────────────────────────────────
 if "messages" not in st.session_state:
@@ -17,20 +18,36 @@ if "messages" not in st.session_state:
 
     # 3) send that payload explicitly (user_message is never None!)
     st.session_state.processing = True
-    with st.spinner("PoloGPT is thinking…"):
-        first_reply = ask_model(
+    st.session_state.last_posts = None
+    if STRUCTURED_POSTS:
+        st.markdown("**PoloGPT:**")
+        # posts appear in the table one by one as they are generated
+        st.session_state.last_posts = stream_posts_table(ask_model_posts_stream(
             st.session_state.messages,
             user_message=initial_payload,
-            token_threshold=TOKEN_THRESHOLD
-        )
+            token_threshold=TOKEN_THRESHOLD,
+            use_cache=USE_RESPONSE_CACHE,  # same boot prompt all day → cache hit
+            n_posts=POSTS_PER_REPLY        # only the first batch has a fixed size
+        ))
+        first_reply = st.session_state.messages[-1]["content"]
+    else:
+        st.markdown("**PoloGPT:**")
+        first_reply = st.write_stream(ask_model_stream(
+            st.session_state.messages,
+            user_message=initial_payload,
+            token_threshold=TOKEN_THRESHOLD,
+            use_cache=USE_RESPONSE_CACHE  # same boot prompt all day → cache hit
+        ))
+    usage_caption()
     st.session_state.last_reply = first_reply
     st.session_state.processing = False
 
 # ─── The rest of your app ─────────────────────────────────────────
 chat_interface(
     history=st.session_state.messages,
-    token_threshold=TOKEN_THRESHOLD
+    token_threshold=TOKEN_THRESHOLD,
+    structured=STRUCTURED_POSTS
 )
 
 if st.session_state.get("last_reply"):
-    sheet_interface(st.session_state.last_reply)
+    sheet_interface(st.session_state.last_reply, st.session_state.get("last_posts"))
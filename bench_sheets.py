@@ -0,0 +1,129 @@
+# bench_sheets.py
+"""
+Offline Sheets benchmarks against fake_sheets.FakeClient.
+
+    python bench_sheets.py                 # all suites
+    python bench_sheets.py fetch quota     # selected suites
+
+- append:  per-click synchronous appends vs. the write-behind queue
+- fetch:   fetch_df (whole sheet) vs. get_headers (row 1) as the sheet grows
+- quota:   bursts under a requests-per-window limit: direct appends that
+           fail with 429 vs. queued rows (one click per flush) that are
+           throttled, retried and all land in the fake sheet (asserted)
+
+The latency model (per request + per cell) is a rough stand-in for the
+real API; compare the numbers relative to each other, not absolutely.
+"""
+import sys
+import time
+import tempfile
+from pathlib import Path
+
+import sheet_client
+from fake_sheets import FakeClient
+
+LATENCY  = 0.05   # seconds per request
+PER_CELL = 2e-6   # seconds per cell transferred
+POSTS    = [["Instagram", "Match Promotion", "🏇 " + "x" * 300, ""]] * 7  # one reply
+
+
+def _fresh(**kwargs):
+    client = FakeClient(latency=LATENCY, per_cell=PER_CELL, **kwargs)
+    sheet_client.set_client(client)
+    return client, sheet_client.get_worksheet()
+
+
+def _drain(timeout: float = 300) -> float:
+    started = time.perf_counter()
+    while sheet_client.queue_stats()["depth"]:
+        if time.perf_counter() - started > timeout:
+            raise TimeoutError("queue did not drain")
+        time.sleep(0.05)
+    return time.perf_counter() - started
+
+
+def bench_append(clicks: int = 50):
+    print(f"\n== append: {clicks} clicks × {len(POSTS)} rows ==")
+    client, ws = _fresh()
+    t = time.perf_counter()
+    for _ in range(clicks):
+        sheet_client.append_rows(ws, POSTS)
+    direct = time.perf_counter() - t
+    print(f"direct   {direct:7.3f}s  {clicks * len(POSTS) / direct:8.1f} rows/s  "
+          f"{client.requests} requests  (UI blocked {direct / clicks * 1000:.1f} ms/click)")
+
+    client, ws = _fresh()
+    t = time.perf_counter()
+    for _ in range(clicks):
+        sheet_client.enqueue_rows(POSTS)
+    enqueue = time.perf_counter() - t
+    total = enqueue + _drain()
+    print(f"queued   {total:7.3f}s  {clicks * len(POSTS) / total:8.1f} rows/s  "
+          f"{client.requests} requests  (UI blocked {enqueue / clicks * 1000:.1f} ms/click)")
+
+
+def bench_fetch(sizes=(100, 1_000, 10_000, 50_000)):
+    print("\n== fetch latency vs. sheet size ==")
+    print(f"{'rows':>8}  {'fetch_df':>10}  {'get_headers':>12}")
+    for n in sizes:
+        _, ws = _fresh()
+        ws.rows.extend(POSTS[0] for _ in range(n))  # seed without paying latency
+        t = time.perf_counter()
+        sheet_client.fetch_df(ws)
+        full = time.perf_counter() - t
+        t = time.perf_counter()
+        sheet_client.get_headers(ws, max_age=0)
+        head = time.perf_counter() - t
+        print(f"{n:>8}  {full * 1000:8.1f}ms  {head * 1000:10.1f}ms")
+
+
+def bench_quota(clicks: int = 40, quota: int = 10, window: float = 1.0):
+    print(f"\n== quota: {clicks} clicks, limit {quota} requests / {window:g}s ==")
+    client, ws = _fresh(quota=quota, window=window)
+    ok = failed = 0
+    t = time.perf_counter()
+    for _ in range(clicks):
+        try:
+            sheet_client.append_rows(ws, POSTS)
+            ok += 1
+        except Exception:
+            failed += 1
+    direct = time.perf_counter() - t
+    print(f"direct   {direct:7.3f}s  {ok} appended, {failed} lost to 429")
+
+    # one click per flush, so the writer issues `clicks` requests and
+    # runs into the quota instead of coalescing everything into one call
+    client, ws = _fresh(quota=quota, window=window)
+    max_batch, sheet_client.QUEUE_MAX_BATCH = sheet_client.QUEUE_MAX_BATCH, len(POSTS)
+    try:
+        t = time.perf_counter()
+        for _ in range(clicks):
+            sheet_client.enqueue_rows(POSTS)
+        total = time.perf_counter() - t + _drain()
+    finally:
+        sheet_client.QUEUE_MAX_BATCH = max_batch
+
+    appended = len(ws.rows) - 1
+    lost = clicks * len(POSTS) - appended
+    print(f"queued   {total:7.3f}s  {appended // len(POSTS)} appended, "
+          f"{client.throttled} throttled request(s) retried, {lost // len(POSTS)} lost")
+    assert client.throttled, "queued path never hit the quota; raise clicks or lower quota"
+    assert lost == 0, f"{lost} queued row(s) missing from the sheet"
+    assert not sheet_client.queue_stats()["dead"], "rows were dead-lettered"
+
+
+SUITES = {"append": bench_append, "fetch": bench_fetch, "quota": bench_quota}
+
+
+def main(argv=None):
+    names = (argv if argv is not None else sys.argv[1:]) or list(SUITES)
+    with tempfile.TemporaryDirectory() as tmp:
+        sheet_client.QUEUE_PATH = Path(tmp) / "queue.sqlite3"
+        sheet_client.SYNC_INDEX_PATH = Path(tmp) / "sheet_index.sqlite3"
+        sheet_client.QUEUE_COALESCE = 0.05
+        for name in names:
+            SUITES[name]()
+
+
+if __name__ == "__main__":
+    main()
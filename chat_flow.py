@@ -1,16 +1,83 @@
 # chat_flow.py
-from openai_client import chat_conversation
+from openai_client import (
+    chat_conversation, chat_conversation_stream, chat_posts, chat_posts_stream
+)
+from posts import dump_posts
 
-def ask_model(history, user_message, model="gpt-4.1-mini", token_threshold=None):
+def ask_model(history, user_message, model="gpt-4.1-mini", token_threshold=None,
+              use_cache=False):
     # append the new user message
     convo = history + [{"role":"user","content":user_message}]
     # get reply
     reply = chat_conversation(
         convo,
         model=model,
-        token_threshold=token_threshold
+        token_threshold=token_threshold,
+        use_cache=use_cache
     )
     # record both turns
     history.append({"role":"user","content":user_message})
     history.append({"role":"assistant","content":reply})
     return reply
+
+def ask_model_stream(history, user_message, model="gpt-4.1-mini", token_threshold=None,
+                     use_cache=False):
+    """
+    Streaming variant of ask_model: yields the reply as text deltas and
+    records both turns in `history` once the stream is exhausted.
+    """
+    convo = history + [{"role":"user","content":user_message}]
+    parts = []
+    for delta in chat_conversation_stream(
+        convo,
+        model=model,
+        token_threshold=token_threshold,
+        use_cache=use_cache
+    ):
+        parts.append(delta)
+        yield delta
+    reply = "".join(parts)
+    history.append({"role":"user","content":user_message})
+    history.append({"role":"assistant","content":reply})
+
+def ask_model_posts(history, user_message, model="gpt-4.1-mini", token_threshold=None,
+                    use_cache=False, n_posts=None):
+    """
+    Structured variant of ask_model: returns the reply as a list of
+    posts.Post and records the canonical {"posts": [...]} JSON in
+    `history` as the assistant turn. `n_posts` enforces a post count
+    (the initial generation); follow-ups leave it None.
+    """
+    convo = history + [{"role":"user","content":user_message}]
+    reply, posts = chat_posts(
+        convo,
+        model=model,
+        token_threshold=token_threshold,
+        use_cache=use_cache,
+        n_posts=n_posts
+    )
+    history.append({"role":"user","content":user_message})
+    history.append({"role":"assistant","content":reply})
+    return posts
+
+def ask_model_posts_stream(history, user_message, model="gpt-4.1-mini", token_threshold=None,
+                           use_cache=False, n_posts=None):
+    """
+    Streaming variant of ask_model_posts: yields (position, Post) as
+    each post is generated and records both turns in `history` once
+    the stream is exhausted.
+    """
+    convo = history + [{"role":"user","content":user_message}]
+    received = {}
+    for i, post in chat_posts_stream(
+        convo,
+        model=model,
+        token_threshold=token_threshold,
+        use_cache=use_cache,
+        n_posts=n_posts
+    ):
+        received[i] = post
+        yield i, post
+    reply = dump_posts([received[i] for i in sorted(received)])
+    history.append({"role":"user","content":user_message})
+    history.append({"role":"assistant","content":reply})
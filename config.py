@@ -13,3 +13,19 @@ TOKEN_THRESHOLD  = 900_000  # 900k for gpt-4.1-mini
 
 USE_CONTEXT  = False
 USE_EXAMPLES = True
+
+# Ask for posts through a strict JSON schema (openai_client.chat_posts)
+# and hand typed posts to the sheet view instead of re-parsing text;
+# only the boot prompt is held to posts.POSTS_PER_REPLY posts
+STRUCTURED_POSTS = True
+
+# With USE_CONTEXT, only the best-matching schedule / e-learning records
+# (BM25 against the request) are sent, up to this many per source
+CONTEXT_TOP_K        = 40
+CONTEXT_TOKEN_BUDGET = 6_000   # tokens per source
+
+# Response cache for deterministic prompts (e.g. the boot auto-prompt)
+USE_RESPONSE_CACHE       = True
+RESPONSE_CACHE_PATH      = BASE / ".cache" / "responses.sqlite3"
+RESPONSE_CACHE_TTL       = 24 * 60 * 60       # seconds
+RESPONSE_CACHE_MAX_BYTES = 50 * 1024 * 1024   # evict LRU beyond this
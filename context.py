@@ -1,52 +1,65 @@
 # context.py
-from datetime import date
-from utils import chunk_json
-from sheets import load_data
+import json
+from utils import chunk_records
+from sheets import load_chunks_cached
+from retrieval import retrieve
+import prompt_layout
 import prompts
 
 from config import (
     ELEARNING_SOURCE, SCHEDULE_SOURCE, MATCHES_SOURCE,
-    USE_CONTEXT, USE_EXAMPLES
+    USE_CONTEXT, USE_EXAMPLES, CONTEXT_TOP_K, CONTEXT_TOKEN_BUDGET
 )
 
 def init_system_messages():
     """
     Returns:
-      - system_msgs: a list of only your system messages
-      - match_chunks: the raw chunk list for next-matches JSON
+      - system_msgs: a list of only your system messages, in the
+        cache-stable prompt_layout order (the date is sent per call)
+      - match_chunks: the (chunk_text, n_tokens) list for next-matches JSON
     """
-    ele_chunks, sch_chunks, match_chunks = load_data(
-        ELEARNING_SOURCE, SCHEDULE_SOURCE, MATCHES_SOURCE
-    )
-    example_chunks = chunk_json(__import__('example_posts').example_posts_json)
-
-    # 1) Core system prompts
-    system_msgs = [
-        {"role":"system","content":prompts.system_prompt},
-        {"role":"system","content":f"Today is {date.today():%Y-%m-%d}."}
-    ]
-
-    # 2) Optionally inject schedule & e-learning
-    if USE_CONTEXT:
-        for c in sch_chunks:
-            system_msgs.append({"role":"system","content":f"<SCHEDULE_DATA>\n{c}"})
-        for c in ele_chunks:
-            system_msgs.append({"role":"system","content":f"<ELEARNING_DATA>\n{c}"})
+    # only the matches are chunked; schedule / e-learning records are
+    # read by the retrieval index when USE_CONTEXT is on
+    match_chunks = load_chunks_cached(MATCHES_SOURCE)
+    sections = {}
 
-    # 3) Optionally inject example posts
+    # 1) Optionally inject example posts (identical for every session)
     if USE_EXAMPLES:
-        for c in example_chunks:
-            system_msgs.append({"role":"system","content":f"<EXAMPLE_POSTS>\n{c}"})
+        sections["<EXAMPLE_POSTS>"] = chunk_records(
+            json.loads(__import__('example_posts').example_posts_json)
+        )
+
+    # 2) Optionally inject the schedule & e-learning records relevant
+    #    to the upcoming matches
+    if USE_CONTEXT:
+        query = "\n".join(text for text, _ in match_chunks)
+        sections.update(retrieve_context(query))
 
+    system_msgs = prompt_layout.system_block(prompts.system_prompt, sections)
     return system_msgs, match_chunks
 
 
-def build_initial_user_message(match_chunks: list[str]) -> str:
+def retrieve_context(
+    query: str,
+    top_k: int = CONTEXT_TOP_K,
+    budget: int = CONTEXT_TOKEN_BUDGET
+) -> dict[str, list[tuple[str, int]]]:
+    """
+    <SCHEDULE_DATA> / <ELEARNING_DATA> sections holding only the top-k
+    records for `query`, each source within `budget` tokens.
+    """
+    return {
+        "<SCHEDULE_DATA>":  retrieve(SCHEDULE_SOURCE, query, top_k, budget),
+        "<ELEARNING_DATA>": retrieve(ELEARNING_SOURCE, query, top_k, budget),
+    }
+
+
+def build_initial_user_message(match_chunks: list[tuple[str, int]]) -> str:
     """
     Builds the very first user-turn payload,
     embedding prompts.prompt_text + your NEXT_MATCHES_JSON block.
     """
-    all_matches = "\n".join(match_chunks)
+    all_matches = "\n".join(text for text, _ in match_chunks)
 
     return "\n\n".join([
         prompts.prompt_text,
@@ -0,0 +1,149 @@
+# fake_sheets.py
+"""
+In-memory stand-in for the slice of gspread that sheet_client uses
+(open_by_key → worksheet → row_values / get_all_values / append_rows /
+batch_update), with a simple latency model and a requests-per-window
+quota that answers 429 like the real API.
+
+Use it with ``SHEETS_BACKEND=fake`` or ``sheet_client.set_client(FakeClient())``.
+"""
+import threading
+import time
+from collections import deque
+
+from gspread.utils import a1_to_rowcol
+
+
+class FakeResponse:
+    def __init__(self, status_code: int, message: str):
+        self.status_code = status_code
+        self.text = message
+
+    def json(self):
+        return {"error": {"code": self.status_code, "message": self.text}}
+
+
+class FakeAPIError(Exception):
+    def __init__(self, status_code: int, message: str):
+        super().__init__(f"{status_code}: {message}")
+        self.response = FakeResponse(status_code, message)
+
+
+class FakeWorksheet:
+    def __init__(self, spreadsheet: "FakeSpreadsheet", title: str, ws_id: int, headers=None):
+        self.spreadsheet = spreadsheet
+        self.spreadsheet_id = spreadsheet.id
+        self.title = title
+        self.id = ws_id
+        self.rows: list[list[str]] = [list(headers)] if headers else []
+        self._lock = threading.Lock()
+
+    # gspread surface -------------------------------------------------
+    def row_values(self, row: int) -> list[str]:
+        self.spreadsheet.client._call(1)
+        with self._lock:
+            return list(self.rows[row - 1]) if row <= len(self.rows) else []
+
+    def get_all_values(self) -> list[list[str]]:
+        with self._lock:
+            cells = sum(len(r) for r in self.rows)
+            data = [list(r) for r in self.rows]
+        self.spreadsheet.client._call(cells)
+        return data
+
+    def append_rows(self, values, **kwargs) -> dict:
+        values = [[str(v) for v in row] for row in values]
+        self.spreadsheet.client._call(sum(len(r) for r in values))
+        with self._lock:
+            start = len(self.rows) + 1
+            self.rows.extend(values)
+        end = start + len(values) - 1
+        width = max((len(r) for r in values), default=1)
+        return {"updates": {
+            "updatedRange": f"'{self.title}'!A{start}:{_col(width)}{end}",
+            "updatedRows": len(values),
+        }}
+
+    def batch_update(self, data, **kwargs) -> dict:
+        self.spreadsheet.client._call(sum(len(v) for d in data for v in d["values"]))
+        with self._lock:
+            for d in data:
+                first = d["range"].split(":")[0].split("!")[-1]
+                row, col = a1_to_rowcol(first)
+                for r_off, values in enumerate(d["values"]):
+                    while len(self.rows) < row + r_off:
+                        self.rows.append([])
+                    target = self.rows[row + r_off - 1]
+                    for c_off, v in enumerate(values):
+                        while len(target) < col + c_off:
+                            target.append("")
+                        target[col + c_off - 1] = str(v)
+        return {"totalUpdatedCells": sum(len(v) for d in data for v in d["values"])}
+
+
+class FakeSpreadsheet:
+    def __init__(self, client: "FakeClient", key: str):
+        self.client = client
+        self.id = key
+        self._worksheets: dict[str, FakeWorksheet] = {}
+
+    def worksheet(self, title: str) -> FakeWorksheet:
+        self.client._call(1)
+        if title not in self._worksheets:
+            self._worksheets[title] = FakeWorksheet(
+                self, title, len(self._worksheets), self.client.headers
+            )
+        return self._worksheets[title]
+
+
+class FakeClient:
+    """
+    latency:   seconds per request
+    per_cell:  extra seconds per cell transferred
+    quota:     max requests per `window` seconds (None = unlimited)
+    """
+    def __init__(
+        self,
+        headers=("Platform", "Category", "Content", "Post ID"),
+        latency: float = 0.0,
+        per_cell: float = 0.0,
+        quota: int | None = None,
+        window: float = 60.0,
+    ):
+        self.headers = headers
+        self.latency = latency
+        self.per_cell = per_cell
+        self.quota = quota
+        self.window = window
+        self.requests = 0
+        self.throttled = 0
+        self._calls = deque()
+        self._lock = threading.Lock()
+        self._sheets: dict[str, FakeSpreadsheet] = {}
+
+    def _call(self, cells: int) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self.requests += 1
+            if self.quota is not None:
+                while self._calls and now - self._calls[0] >= self.window:
+                    self._calls.popleft()
+                if len(self._calls) >= self.quota:
+                    self.throttled += 1
+                    raise FakeAPIError(429, "Quota exceeded for quota metric 'Write requests'")
+                self._calls.append(now)
+        time.sleep(self.latency + cells * self.per_cell)
+
+    def open_by_key(self, key: str) -> FakeSpreadsheet:
+        self._call(1)
+        if key not in self._sheets:
+            self._sheets[key] = FakeSpreadsheet(self, key)
+        return self._sheets[key]
+
+
+def _col(n: int) -> str:
+    name = ""
+    while n:
+        n, rem = divmod(n - 1, 26)
+        name = chr(65 + rem) + name
+    return name
@@ -0,0 +1,55 @@
+# json_stream.py
+import json
+
+
+class ArrayItemStream:
+    """
+    Incremental parser for a streamed JSON array of objects, either bare
+    (`[{…}, …]`) or wrapped in an object (`{"posts": [{…}, …]}`).
+
+    Feed it text deltas as they arrive; each call returns the array's
+    objects that closed within that delta, already decoded. Only the
+    object currently being generated is buffered, and strings are
+    tracked (with escapes) so braces inside post text do not count.
+    """
+    def __init__(self):
+        self._stack: list[str] = []     # open containers, "[" or "{"
+        self._in_string = False
+        self._escaped = False
+        self._item_depth: int | None = None  # stack depth of the items
+        self._buf: list[str] | None = None   # chars of the open item
+
+    def feed(self, text: str) -> list[dict]:
+        done = []
+        for ch in text:
+            if self._buf is not None:
+                self._buf.append(ch)
+
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == "\\":
+                    self._escaped = True
+                elif ch == '"':
+                    self._in_string = False
+                continue
+
+            if ch == '"':
+                self._in_string = True
+            elif ch in "[{":
+                if (
+                    ch == "{" and self._buf is None
+                    and self._stack and self._stack[-1] == "["
+                    and self._item_depth in (None, len(self._stack))
+                ):
+                    # the first array holding objects is the item array
+                    self._item_depth = len(self._stack)
+                    self._buf = ["{"]
+                self._stack.append(ch)
+            elif ch in "]}":
+                if self._stack:
+                    self._stack.pop()
+                if ch == "}" and self._buf is not None and len(self._stack) == self._item_depth:
+                    done.append(json.loads("".join(self._buf)))
+                    self._buf = None
+        return done
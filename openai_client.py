@@ -1,7 +1,20 @@
 import os
+import hashlib
+import threading
+from contextlib import contextmanager
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Iterator
 from dotenv import load_dotenv
 from openai import OpenAI
-import tiktoken
+
+import response_cache
+import prompt_layout
+from posts import (
+    Post, RESPONSE_FORMAT, POSTS_PER_REPLY,
+    parse_posts, recover_posts, post_problem, to_post, dump_posts
+)
+from json_stream import ArrayItemStream
+from tokens import count_messages
 
 # ─── Setup ────────────────────────────────────────────────────────
 BASE = os.path.dirname(__file__)
@@ -13,43 +26,209 @@ if not _api_key:
 
 _client = OpenAI(api_key=_api_key)
 
+# ─── Usage ────────────────────────────────────────────────────────
+# The last call's token usage per thread (each Streamlit session runs
+# in its own script thread) plus process-wide totals. `cached_tokens`
+# is the part of the prompt served from the provider's prompt cache.
+_last_usage = threading.local()
+_usage_totals = {"calls": 0, "prompt_tokens": 0, "cached_tokens": 0, "completion_tokens": 0}
+_usage_lock = threading.Lock()
+
+def _record_usage(usage) -> None:
+    if usage is None:
+        return
+    details = getattr(usage, "prompt_tokens_details", None)
+    cached = (getattr(details, "cached_tokens", None) or 0) if details else 0
+    record = {
+        "prompt_tokens":     usage.prompt_tokens,
+        "cached_tokens":     cached,
+        "uncached_tokens":   usage.prompt_tokens - cached,
+        "completion_tokens": usage.completion_tokens,
+    }
+    last = getattr(_last_usage, "value", None)
+    if getattr(_last_usage, "accumulate", False) and last is not None:
+        _last_usage.value = {k: last[k] + record[k] for k in record}
+    else:
+        _last_usage.value = record
+    with _usage_lock:
+        _usage_totals["calls"] += 1
+        for k in ("prompt_tokens", "cached_tokens", "completion_tokens"):
+            _usage_totals[k] += record[k]
+
+@contextmanager
+def _usage_scope():
+    # sum every call made in the block (e.g. a reply plus its repairs)
+    # into one get_last_usage() record
+    _last_usage.value = None
+    _last_usage.accumulate = True
+    try:
+        yield
+    finally:
+        _last_usage.accumulate = False
+
+def get_last_usage() -> dict | None:
+    """
+    Usage of this thread's last completion (summed over a structured
+    reply and its repair calls): prompt / cached / uncached / completion
+    tokens, or None if nothing was sent yet (or it was a response-cache
+    hit).
+    """
+    return getattr(_last_usage, "value", None)
+
+def get_usage_totals() -> dict:
+    with _usage_lock:
+        return dict(_usage_totals)
+
 # ─── Core Helpers ─────────────────────────────────────────────────
 def get_completion(
     messages: list[dict],
     model: str = "gpt-4.1-mini",
-    temperature: float = 0.3
+    temperature: float = 0.3,
+    response_format: dict | None = None
 ) -> str:
+    extra = {"response_format": response_format} if response_format else {}
     resp = _client.chat.completions.create(
         model=model,
         messages=messages,
         temperature=temperature,
+        **extra,
     )
+    _record_usage(resp.usage)
     return resp.choices[0].message.content
 
+def stream_completion(
+    messages: list[dict],
+    model: str = "gpt-4.1-mini",
+    temperature: float = 0.3,
+    response_format: dict | None = None
+) -> Iterator[str]:
+    """
+    Same as get_completion, but yields the reply text delta by delta
+    as it is generated.
+    """
+    extra = {"response_format": response_format} if response_format else {}
+    stream = _client.chat.completions.create(
+        model=model,
+        messages=messages,
+        temperature=temperature,
+        stream=True,
+        **extra,
+        stream_options={"include_usage": True},
+    )
+    for chunk in stream:
+        if not chunk.choices:
+            _record_usage(chunk.usage)  # final chunk carries the usage
+            continue
+        delta = chunk.choices[0].delta.content
+        if delta:
+            yield delta
+
 def _count_tokens(messages: list[dict], model: str) -> int:
-    try:
-        enc = tiktoken.encoding_for_model(model)
-    except KeyError:
-        enc = tiktoken.get_encoding("cl100k_base")
-    return sum(len(enc.encode(m["content"])) for m in messages)
+    # cached encoder + per-message ledger: only unseen messages are encoded
+    return count_messages(messages, model)
 
-def _summarize_history(
-    messages: list[dict],
+# ─── Rolling summary ──────────────────────────────────────────────
+# The conversation after the leading system block is split into
+# [folded | window]. The last SUMMARY_WINDOW messages are always sent
+# verbatim; older ones are folded into a running summary a few at a
+# time (previous summary + ≤ SUMMARY_FOLD messages per call). Summaries
+# are memoized by a hash of the exact prefix they cover, so each turn
+# only folds what newly slid out of the window, and folding starts in
+# the background once a history passes SUMMARY_PREFETCH × threshold.
+SUMMARY_WINDOW   = 6
+SUMMARY_FOLD     = 4
+SUMMARY_PREFETCH = 0.8
+SUMMARY_CACHE_MAX = 10_000
+
+_summaries: dict[str, str] = {}   # prefix hash -> summary of that prefix
+_inflight: dict[str, Future] = {}
+_summary_lock = threading.Lock()
+_summary_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="summarizer")
+
+def _split_head(messages: list[dict]) -> tuple[list[dict], list[dict]]:
+    n = 0
+    while n < len(messages) and messages[n]["role"] == "system":
+        n += 1
+    return messages[:n], messages[n:]
+
+def _prefix_hashes(turns: list[dict]) -> list[str]:
+    # hashes[i] identifies turns[:i]
+    h = hashlib.sha1()
+    hashes = [h.hexdigest()]
+    for m in turns:
+        h.update(f"{m['role']}\0{m['content']}\0".encode("utf-8"))
+        hashes.append(h.copy().hexdigest())
+    return hashes
+
+def _fold_turns(
+    summary: str,
+    turns: list[dict],
     model: str,
     temperature: float
 ) -> str:
     # Only user and assistant turns go into the summary prompt
     convo = "\n".join(
         f"{m['role']}: {m['content']}"
-        for m in messages
+        for m in turns
         if m["role"] in ("user", "assistant")
     )
+    if not convo:
+        return summary
     summary_prompt = [
-        {"role": "system", "content": "You are a concise summarizer."},
-        {"role": "user",   "content": convo}
+        {"role": "system", "content": (
+            "You are a concise summarizer. Update the running summary of a "
+            "conversation with the new turns, keeping facts, decisions and "
+            "user preferences. Reply with the updated summary only."
+        )},
+        {"role": "user", "content": (
+            f"<SUMMARY>\n{summary or '(empty)'}\n</SUMMARY>\n\n"
+            f"<NEW_TURNS>\n{convo}\n</NEW_TURNS>"
+        )}
     ]
     return get_completion(summary_prompt, model=model, temperature=temperature)
 
+def _fold_until(
+    turns: list[dict],
+    upto: int,
+    model: str,
+    temperature: float
+) -> str:
+    """
+    Summary of turns[:upto], built from the longest already-summarized
+    prefix in SUMMARY_FOLD-sized steps.
+    """
+    hashes = _prefix_hashes(turns[:upto])
+    with _summary_lock:
+        start = next(
+            (i for i in range(upto, 0, -1) if hashes[i] in _summaries), 0
+        )
+        summary = _summaries.get(hashes[start], "")
+
+    while start < upto:
+        end = min(start + SUMMARY_FOLD, upto)
+        summary = _fold_turns(summary, turns[start:end], model, temperature)
+        with _summary_lock:
+            if len(_summaries) >= SUMMARY_CACHE_MAX:
+                _summaries.clear()
+            _summaries[hashes[end]] = summary
+        start = end
+    return summary
+
+def _fold_async(
+    turns: list[dict],
+    upto: int,
+    model: str,
+    temperature: float
+) -> Future:
+    key = _prefix_hashes(turns[:upto])[-1]
+    with _summary_lock:
+        fut = _inflight.get(key)
+        if fut is None:
+            fut = _summary_pool.submit(_fold_until, list(turns), upto, model, temperature)
+            _inflight[key] = fut
+            fut.add_done_callback(lambda _f, k=key: _inflight.pop(k, None))
+    return fut
+
 def _prepare_messages(
     messages: list[dict],
     threshold: int,
@@ -57,37 +236,248 @@ def _prepare_messages(
     temperature: float
 ) -> list[dict]:
     """
-    If total tokens ≤ threshold: return messages as-is.
-    Otherwise:
-      1) keep ONLY the system messages
-      2) summarize all user+assistant turns into one system message
-      3) return [<all_system_msgs>, <HISTORY_SUMMARY>]
+    If total tokens ≤ threshold: return messages as-is (and, past
+    SUMMARY_PREFETCH × threshold, pre-fold older turns in the background).
+    Otherwise return:
+      [<leading system msgs>, <HISTORY_SUMMARY of older turns>, <last SUMMARY_WINDOW msgs>]
     """
-    if _count_tokens(messages, model) <= threshold:
+    head, turns = _split_head(messages)
+    upto = max(0, len(turns) - SUMMARY_WINDOW)
+    total = _count_tokens(messages, model)
+
+    if total <= threshold:
+        if upto and total >= SUMMARY_PREFETCH * threshold:
+            _fold_async(turns, upto, model, temperature)
         return messages
 
-    # 1) Pull out all system messages
-    system_messages = [m for m in messages if m["role"] == "system"]
+    if not upto:
+        return messages  # nothing old enough to fold
 
-    # 2) Summarize the chat turns
-    summary = _summarize_history(messages, model, temperature)
+    # waits on a background fold if one is already running for this prefix
+    summary = _fold_async(turns, upto, model, temperature).result()
     summary_msg = {"role": "system", "content": f"<HISTORY_SUMMARY>\n{summary}"}
 
-    # 3) Return system context + summary
-    return system_messages + [summary_msg]
+    return head + [summary_msg] + turns[upto:]
 
 # ─── Public API ──────────────────────────────────────────────────
 def chat_conversation(
     messages: list[dict],
     model: str = "gpt-4.1-mini",
     temperature: float = 0.3,
-    token_threshold: int = 900000
+    token_threshold: int = 900000,
+    use_cache: bool = False,
+    volatile: list[dict] | None = None,
+    response_format: dict | None = None
 ) -> str:
     """
     Continue a chat given a list of messages.
-    Automatically summarizes if over `token_threshold`, 
-    **while preserving ALL system messages**.
+    Automatically folds older turns into a rolling summary if over
+    `token_threshold`, **while preserving the leading system messages**.
+    `volatile` system messages (default: today's date) are sent after
+    the history, right before the new user turn, so the prefix stays
+    cacheable; see prompt_layout.
+    With `use_cache`, replies are served from / stored in the on-disk
+    response cache keyed on (model, temperature, messages).
+    `response_format` is passed through to the API (see chat_posts).
     Returns the assistant’s reply.
     """
-    to_send = _prepare_messages(messages, token_threshold, model, temperature)
-    return get_completion(to_send, model=model, temperature=temperature)
+    _last_usage.value = None
+    if volatile is None:
+        volatile = [prompt_layout.date_message()]
+    if use_cache:
+        key = response_cache.make_key(prompt_layout.assemble(messages, volatile), model, temperature)
+        cached = response_cache.get(key)
+        if cached is not None:
+            return cached
+    to_send = prompt_layout.assemble(
+        _prepare_messages(messages, token_threshold, model, temperature), volatile
+    )
+    reply = get_completion(to_send, model=model, temperature=temperature,
+                           response_format=response_format)
+    if use_cache:
+        response_cache.put(key, reply)
+    return reply
+
+def chat_posts(
+    messages: list[dict],
+    model: str = "gpt-4.1-mini",
+    temperature: float = 0.3,
+    token_threshold: int = 900000,
+    use_cache: bool = False,
+    volatile: list[dict] | None = None,
+    n_posts: int | None = POSTS_PER_REPLY,
+    max_repairs: int = 2
+) -> tuple[str, list[Post]]:
+    """
+    Structured-output mode of chat_conversation: the reply is requested
+    against posts.RESPONSE_FORMAT (a strict JSON schema) and validated.
+    Only the invalid posts, and with `n_posts` the missing ones, are
+    re-prompted for, up to `max_repairs` times; posts still invalid
+    after that are dropped. Pass n_posts=None for follow-up turns that
+    may return any number of posts.
+    Returns (reply_json, posts), where reply_json is the canonical
+    {"posts": [...]} text to record in the history.
+    """
+    _last_usage.value = None
+    if volatile is None:
+        volatile = [prompt_layout.date_message()]
+    if use_cache:
+        key = response_cache.make_key(
+            prompt_layout.assemble(messages, volatile), f"{model}:posts", temperature
+        )
+        cached = response_cache.get(key)
+        if cached is not None:
+            return cached, [to_post(item) for item in parse_posts(cached)]
+
+    with _usage_scope():
+        text = chat_conversation(
+            messages, model, temperature, token_threshold,
+            volatile=volatile, response_format=RESPONSE_FORMAT
+        )
+        items = _repair_posts(
+            messages, text, n_posts, max_repairs, model, temperature, token_threshold, volatile
+        )
+    posts = [to_post(item) for item in items if item is not None and post_problem(item) is None]
+    reply = dump_posts(posts)
+    if use_cache and posts and len(posts) == len(items):
+        response_cache.put(key, reply)
+    return reply, posts
+
+def chat_posts_stream(
+    messages: list[dict],
+    model: str = "gpt-4.1-mini",
+    temperature: float = 0.3,
+    token_threshold: int = 900000,
+    use_cache: bool = False,
+    volatile: list[dict] | None = None,
+    n_posts: int | None = POSTS_PER_REPLY,
+    max_repairs: int = 2
+) -> Iterator[tuple[int, Post]]:
+    """
+    Streaming variant of chat_posts: yields (position, Post) as soon as
+    each post object closes in the completion stream, then the repaired
+    replacements for invalid or missing posts once the stream ends.
+    Positions follow the reply order; repaired posts arrive out of order.
+    """
+    _last_usage.value = None
+    if volatile is None:
+        volatile = [prompt_layout.date_message()]
+    if use_cache:
+        key = response_cache.make_key(
+            prompt_layout.assemble(messages, volatile), f"{model}:posts", temperature
+        )
+        cached = response_cache.get(key)
+        if cached is not None:
+            for i, item in enumerate(parse_posts(cached)):
+                yield i, to_post(item)
+            return
+
+    with _usage_scope():
+        to_send = prompt_layout.assemble(
+            _prepare_messages(messages, token_threshold, model, temperature), volatile
+        )
+        parser, parts, streamed, sent = ArrayItemStream(), [], [], set()
+        for delta in stream_completion(to_send, model=model, temperature=temperature,
+                                       response_format=RESPONSE_FORMAT):
+            parts.append(delta)
+            for item in parser.feed(delta):
+                i = len(streamed)
+                streamed.append(item)
+                if (n_posts is None or i < n_posts) and post_problem(item) is None:
+                    sent.add(i)
+                    yield i, to_post(item)
+
+        # repair from what the parser already checked and sent, so those
+        # positions are never re-requested even if the reply was cut off
+        items = _repair_posts(
+            messages, "".join(parts), n_posts, max_repairs, model, temperature, token_threshold,
+            volatile, items=streamed
+        )
+    valid = {}
+    for i, item in enumerate(items):
+        if item is not None and post_problem(item) is None:
+            valid[i] = to_post(item)
+            if i not in sent:
+                yield i, valid[i]
+    if use_cache and valid and len(valid) == len(items):
+        response_cache.put(key, dump_posts([valid[i] for i in sorted(valid)]))
+
+def _repair_posts(
+    messages: list[dict],
+    text: str,
+    n_posts: int | None,
+    max_repairs: int,
+    model: str,
+    temperature: float,
+    token_threshold: int,
+    volatile: list[dict],
+    items: list | None = None
+) -> list:
+    """
+    The reply's post items with the invalid ones (and, with `n_posts`,
+    the missing ones) replaced by re-prompted ones; the repair prompt
+    shares the original prefix. `items` are the already-parsed items of
+    `text` (e.g. from the stream parser); by default `text` is parsed,
+    keeping the complete posts of a reply that does not parse as a whole.
+    """
+    items = list(recover_posts(text or "") if items is None else items)
+    if n_posts is not None:
+        items = items[:n_posts] + [None] * (n_posts - len(items))
+
+    for _ in range(max_repairs):
+        bad = [i for i, item in enumerate(items) if item is None or post_problem(item)]
+        if not bad:
+            break
+        problems = "\n".join(
+            f"- post {i + 1}: {'missing' if items[i] is None else post_problem(items[i])}"
+            for i in bad
+        )
+        repair = messages + [
+            {"role": "assistant", "content": text or ""},
+            {"role": "user", "content": (
+                f"These posts are unusable:\n{problems}\n"
+                f"Reply with exactly {len(bad)} replacement post(s), in that order. "
+                "Do not repeat the other posts."
+            )},
+        ]
+        to_send = prompt_layout.assemble(
+            _prepare_messages(repair, token_threshold, model, temperature), volatile
+        )
+        fixed = recover_posts(get_completion(
+            to_send, model=model, temperature=temperature, response_format=RESPONSE_FORMAT
+        ) or "")
+        for i, item in zip(bad, fixed):
+            items[i] = item
+    return items
+
+def chat_conversation_stream(
+    messages: list[dict],
+    model: str = "gpt-4.1-mini",
+    temperature: float = 0.3,
+    token_threshold: int = 900000,
+    use_cache: bool = False,
+    volatile: list[dict] | None = None
+) -> Iterator[str]:
+    """
+    Streaming variant of chat_conversation.
+    Yields the assistant’s reply as text deltas; a cache hit is
+    yielded in one piece.
+    """
+    _last_usage.value = None
+    if volatile is None:
+        volatile = [prompt_layout.date_message()]
+    if use_cache:
+        key = response_cache.make_key(prompt_layout.assemble(messages, volatile), model, temperature)
+        cached = response_cache.get(key)
+        if cached is not None:
+            yield cached
+            return
+    to_send = prompt_layout.assemble(
+        _prepare_messages(messages, token_threshold, model, temperature), volatile
+    )
+    parts = []
+    for delta in stream_completion(to_send, model=model, temperature=temperature):
+        parts.append(delta)
+        yield delta
+    if use_cache:
+        response_cache.put(key, "".join(parts))
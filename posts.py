@@ -0,0 +1,91 @@
+# posts.py
+import json
+from dataclasses import dataclass, asdict
+
+from json_stream import ArrayItemStream
+
+# ─── Typed ad posts ───────────────────────────────────────────────
+# The model is asked for {"posts": [{Platform, Category, Content}, …]}
+# through a strict JSON schema, so replies parse by construction; the
+# checks below catch what a schema cannot express (blank fields, an
+# over-long post, the wrong number of posts).
+POST_FIELDS      = ("Platform", "Category", "Content")
+POSTS_PER_REPLY  = 7
+MAX_CONTENT_CHARS = 1_000
+
+POST_SCHEMA = {
+    "type": "object",
+    "properties": {f: {"type": "string"} for f in POST_FIELDS},
+    "required": list(POST_FIELDS),
+    "additionalProperties": False,
+}
+
+RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "ad_posts",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {"posts": {"type": "array", "items": POST_SCHEMA}},
+            "required": ["posts"],
+            "additionalProperties": False,
+        },
+    },
+}
+
+
+@dataclass(frozen=True)
+class Post:
+    Platform: str
+    Category: str
+    Content: str
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+def post_problem(item) -> str | None:
+    """
+    Why `item` is not a usable post, or None if it is.
+    """
+    if not isinstance(item, dict):
+        return "not an object"
+    for f in POST_FIELDS:
+        if not isinstance(item.get(f), str) or not item[f].strip():
+            return f"missing or empty {f!r}"
+    if len(item["Content"]) > MAX_CONTENT_CHARS:
+        return f"Content longer than {MAX_CONTENT_CHARS} characters"
+    return None
+
+
+def to_post(item: dict) -> Post:
+    return Post(*(item[f].strip() for f in POST_FIELDS))
+
+
+def parse_posts(text: str) -> list:
+    """
+    The raw post items of a structured reply ({"posts": [...]}); a bare
+    JSON array is accepted too. Raises ValueError if neither.
+    """
+    loaded = json.loads(text)
+    if isinstance(loaded, dict):
+        loaded = loaded.get("posts")
+    if not isinstance(loaded, list):
+        raise ValueError("reply is not a list of posts")
+    return loaded
+
+
+def recover_posts(text: str) -> list:
+    """
+    parse_posts, but a reply that does not parse as a whole (e.g. cut
+    off mid-post) still yields the post objects that did close.
+    """
+    try:
+        return parse_posts(text)
+    except ValueError:
+        return ArrayItemStream().feed(text)
+
+
+def dump_posts(posts: list[Post]) -> str:
+    return json.dumps({"posts": [p.as_dict() for p in posts]}, ensure_ascii=False)
@@ -0,0 +1,57 @@
+# prompt_layout.py
+"""
+Message assembly for provider-side prompt caching.
+
+The API caches the longest previously-seen *prefix* of a prompt, so the
+layout is, most stable first:
+
+    [system_prompt, <EXAMPLE_POSTS>…, <SCHEDULE_DATA>…, <ELEARNING_DATA>…,
+     <HISTORY_SUMMARY>?, history…, volatile (date, …), latest user turn]
+
+The system block is built once per session and never edited, and
+anything that changes between calls (the date, per-request retrieval)
+is appended right before the newest user turn instead of being stored
+in the history, so consecutive calls share everything up to the last
+exchange.
+"""
+from datetime import date
+from typing import Iterable
+
+from utils import MODEL, tagged_messages
+
+STABLE_TAGS = ("<EXAMPLE_POSTS>", "<SCHEDULE_DATA>", "<ELEARNING_DATA>")
+
+def system_block(
+    system_prompt: str,
+    sections: dict[str, Iterable[tuple[str, int]]],
+    model: str = MODEL
+) -> list[dict]:
+    """
+    The leading system messages in canonical order: the prompt, then
+    each tagged section in STABLE_TAGS order (least to most likely to
+    change), whatever order `sections` was given in.
+    """
+    msgs = [{"role":"system","content":system_prompt}]
+    for tag in STABLE_TAGS:
+        if tag in sections:
+            msgs += tagged_messages(tag, sections[tag], model)
+    return msgs
+
+def date_message(today: date | None = None) -> dict:
+    return {"role":"system","content":f"Today is {today or date.today():%Y-%m-%d}."}
+
+def assemble(
+    messages: list[dict],
+    volatile: Iterable[dict] = ()
+) -> list[dict]:
+    """
+    `messages` with the volatile system messages placed after the
+    history, right before the trailing user turn (or at the very end
+    if the last message is not a user turn).
+    """
+    volatile = list(volatile)
+    if not volatile:
+        return messages
+    if messages and messages[-1]["role"] == "user":
+        return messages[:-1] + volatile + messages[-1:]
+    return messages + volatile
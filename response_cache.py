@@ -0,0 +1,93 @@
+# response_cache.py
+import hashlib
+import json
+import sqlite3
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+from config import (
+    RESPONSE_CACHE_PATH, RESPONSE_CACHE_TTL, RESPONSE_CACHE_MAX_BYTES
+)
+
+# ─── Content-addressed reply store ────────────────────────────────
+# Replies are keyed on (model, temperature, message list hash) and kept
+# in a local SQLite file shared by every session and process, with TTL
+# expiry and least-recently-used eviction past RESPONSE_CACHE_MAX_BYTES.
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key         TEXT PRIMARY KEY,
+    reply       TEXT NOT NULL,
+    size        INTEGER NOT NULL,
+    created_at  REAL NOT NULL,
+    accessed_at REAL NOT NULL
+)
+"""
+
+@contextmanager
+def _connect() -> Iterator[sqlite3.Connection]:
+    RESPONSE_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(RESPONSE_CACHE_PATH, timeout=10)
+    try:
+        with conn:  # commit on success, roll back on error
+            conn.execute(_SCHEMA)
+            yield conn
+    finally:
+        conn.close()
+
+def make_key(messages: list[dict], model: str, temperature: float) -> str:
+    payload = json.dumps(
+        [model, temperature, [(m["role"], m["content"]) for m in messages]],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def get(key: str) -> str | None:
+    now = time.time()
+    with _connect() as conn:
+        row = conn.execute(
+            "SELECT reply, created_at FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        reply, created_at = row
+        if now - created_at > RESPONSE_CACHE_TTL:
+            conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            return None
+        conn.execute(
+            "UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key)
+        )
+    return reply
+
+def put(key: str, reply: str) -> None:
+    now = time.time()
+    size = len(reply.encode("utf-8"))
+    with _connect() as conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+            (key, reply, size, now, now),
+        )
+        conn.execute(
+            "DELETE FROM responses WHERE created_at < ?",
+            (now - RESPONSE_CACHE_TTL,),
+        )
+        _evict(conn)
+
+def _evict(conn: sqlite3.Connection) -> None:
+    (total,) = conn.execute(
+        "SELECT COALESCE(SUM(size), 0) FROM responses"
+    ).fetchone()
+    if total <= RESPONSE_CACHE_MAX_BYTES:
+        return
+    for key, size in conn.execute(
+        "SELECT key, size FROM responses ORDER BY accessed_at"
+    ).fetchall():
+        conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+        total -= size
+        if total <= RESPONSE_CACHE_MAX_BYTES:
+            break
+
+def clear() -> None:
+    with _connect() as conn:
+        conn.execute("DELETE FROM responses")
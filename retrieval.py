@@ -0,0 +1,129 @@
+# retrieval.py
+"""
+Local BM25 retrieval over the schedule / e-learning dumps, so a request
+carries only the records relevant to its query (e.g. the upcoming
+matches) instead of every chunk of both datasets.
+"""
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter, defaultdict
+from typing import Iterable
+
+import tokens
+from sheets import iter_records
+from utils import MODEL, chunk_records
+
+_WORD = re.compile(r"\w+")
+
+def _terms(text: str) -> list[str]:
+    return _WORD.findall(text.lower())
+
+
+class BM25Index:
+    """
+    Inverted index over whole records (their compact JSON text).
+    Scoring only touches the postings of the query's terms, so a search
+    costs O(matching postings), not O(records).
+    """
+    def __init__(
+        self,
+        records: Iterable[dict],
+        model: str = MODEL,
+        k1: float = 1.5,
+        b: float = 0.75
+    ):
+        self.model = model
+        self.k1, self.b = k1, b
+        self.records: list[dict] = []
+        self.n_tokens: list[int] = []
+        self.lengths: list[int] = []
+        self.postings: dict[str, list[tuple[int, int]]] = defaultdict(list)
+
+        enc = tokens.get_encoder(model)
+        for doc, rec in enumerate(records):
+            text = json.dumps(rec, ensure_ascii=False, separators=(",", ":"))
+            terms = _terms(text)
+            for term, tf in Counter(terms).items():
+                self.postings[term].append((doc, tf))
+            self.records.append(rec)
+            self.lengths.append(len(terms))
+            self.n_tokens.append(len(enc.encode(text)))
+
+        n = len(self.records)
+        self.avg_len = sum(self.lengths) / n if n else 0.0
+        self.idf = {
+            term: math.log(1 + (n - len(p) + 0.5) / (len(p) + 0.5))
+            for term, p in self.postings.items()
+        }
+
+    def search(self, query: str, top_k: int) -> list[tuple[int, float]]:
+        """
+        (record_index, score) pairs, best first; records sharing no
+        term with the query are never returned.
+        """
+        scores: dict[int, float] = defaultdict(float)
+        for term, qtf in Counter(_terms(query)).items():
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for doc, tf in self.postings[term]:
+                norm = self.k1 * (1 - self.b + self.b * self.lengths[doc] / self.avg_len)
+                scores[doc] += qtf * idf * tf * (self.k1 + 1) / (tf + norm)
+        return sorted(scores.items(), key=lambda s: s[1], reverse=True)[:top_k]
+
+    def select(
+        self,
+        query: str,
+        top_k: int,
+        budget: int
+    ) -> list[tuple[str, int]]:
+        """
+        The best records for `query` that fit in `budget` tokens, packed
+        as (chunk_text, n_tokens) pairs ready for tagged_messages.
+        """
+        picked, used = [], 0
+        for doc, _ in self.search(query, top_k):
+            n = self.n_tokens[doc]
+            if used + n > budget:
+                continue  # a smaller, lower-ranked record may still fit
+            picked.append(doc)
+            used += n
+        # keep the dump's own order (e.g. chronological schedule)
+        return list(chunk_records(
+            (self.records[doc] for doc in sorted(picked)), model=self.model
+        ))
+
+
+# ─── Process-wide index cache ─────────────────────────────────────
+# One index per source file, rebuilt only when its (mtime, size)
+# signature changes — same policy as sheets.load_chunks_cached.
+_indexes: dict[tuple[str, str], tuple[tuple[int, int], BM25Index]] = {}
+_indexes_lock = threading.Lock()
+
+def get_index(path: str, model: str = MODEL) -> BM25Index:
+    st = os.stat(path)
+    sig = (st.st_mtime_ns, st.st_size)
+    with _indexes_lock:
+        hit = _indexes.get((path, model))
+        if hit is not None and hit[0] == sig:
+            return hit[1]
+        index = BM25Index(iter_records(path), model)
+        _indexes[(path, model)] = (sig, index)
+        return index
+
+def retrieve(
+    path: str,
+    query: str,
+    top_k: int,
+    budget: int,
+    model: str = MODEL
+) -> list[tuple[str, int]]:
+    """
+    Top-k records of the JSON dump at `path` for `query`, within
+    `budget` tokens, as (chunk_text, n_tokens) pairs. The limits come
+    from config.CONTEXT_TOP_K / CONTEXT_TOKEN_BUDGET.
+    """
+    return get_index(path, model).select(query, top_k, budget)
@@ -1,6 +1,18 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
 import gspread
+from gspread.utils import rowcol_to_a1
 import pandas as pd
-from oauth2client.service_account import ServiceAccountCredentials
+from google.auth.transport.requests import AuthorizedSession
+from google.oauth2.service_account import Credentials
+from requests.adapters import HTTPAdapter
+from requests.exceptions import ConnectionError as TransportError, Timeout
 
 # -----------------------------
 # CONFIGURATION
@@ -12,12 +24,119 @@ SCOPE = [
 CREDS_PATH = "/content/trial-465018-48d518fd746f.json"
 SHEET_ID = "1sJdOnY0J3YpybcgWsIwVWuc-8JzjLxXZ2MHu8KXHqpw"
 TAB_NAME = "Sheet-1"
+SHEETS_BACKEND = os.getenv("SHEETS_BACKEND", "google")  # or "fake" (fake_sheets.py)
+POOL_SIZE = 10
+HEADER_TTL = 300  # seconds a cached header row is trusted
+
+QUEUE_PATH = Path(__file__).parent / ".cache" / "sheet_queue.sqlite3"
+QUEUE_MAX_BATCH = 500      # rows per append_rows call
+QUEUE_COALESCE = 0.5       # seconds to gather more rows before a flush
+QUEUE_MAX_BACKOFF = 60     # seconds
+
+SYNC_INDEX_PATH = Path(__file__).parent / ".cache" / "sheet_index.sqlite3"
+
+# -----------------------------
+# PROCESS-WIDE CLIENT
+# -----------------------------
+# Credentials are loaded once; AuthorizedSession refreshes the access
+# token on its own and keeps a pooled keep-alive connection to the API.
+# The worksheet handle is cached too, so an append is one round-trip.
+_lock = threading.Lock()
+_client = None
+_worksheet = None
+_headers: dict[int, tuple[float, list[str]]] = {}  # worksheet id -> (fetched_at, row 1)
+_absent: dict[int, set[str]] = {}  # worksheet id -> dict keys row 1 lacked when last read
+
+def get_client() -> gspread.Client:
+    global _client
+    with _lock:
+        if _client is None and SHEETS_BACKEND == "fake":
+            from fake_sheets import FakeClient
+            _client = FakeClient()
+        elif _client is None:
+            creds = Credentials.from_service_account_file(CREDS_PATH, scopes=SCOPE)
+            session = AuthorizedSession(creds)
+            adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+            session.mount("https://", adapter)
+            _client = gspread.authorize(creds, session=session)
+        return _client
+
+def set_client(client):
+    """
+    Swap in another gspread-compatible client (e.g. fake_sheets.FakeClient)
+    and drop the cached worksheet and headers.
+    """
+    global _client, _worksheet
+    with _lock:
+        _client = client
+        _worksheet = None
+        _headers.clear()
+        _absent.clear()
 
 def get_worksheet():
-    creds = ServiceAccountCredentials.from_json_keyfile_name(CREDS_PATH, SCOPE)
-    client = gspread.authorize(creds)
-    sheet = client.open_by_key(SHEET_ID)
-    return sheet.worksheet(TAB_NAME)
+    global _worksheet
+    client = get_client()
+    with _lock:
+        if _worksheet is None:
+            sheet = client.open_by_key(SHEET_ID)
+            _worksheet = sheet.worksheet(TAB_NAME)
+        return _worksheet
+
+def reset_worksheet():
+    """
+    Drop the cached worksheet handle (e.g. after the tab was renamed
+    or recreated); the next get_worksheet() re-opens it.
+    """
+    global _worksheet
+    with _lock:
+        _worksheet = None
+        _headers.clear()
+        _absent.clear()
+
+def get_headers(worksheet, max_age: float = HEADER_TTL) -> list[str]:
+    """
+    The sheet's header row, read from row 1 only (not the whole sheet)
+    and cached for `max_age` seconds, so a header edit in the sheet is
+    picked up within that window.
+    """
+    now = time.monotonic()
+    with _lock:
+        hit = _headers.get(worksheet.id)
+    if hit is not None and now - hit[0] < max_age:
+        return hit[1]
+    headers = worksheet.row_values(1)
+    with _lock:
+        _headers[worksheet.id] = (now, headers)
+    return headers
+
+def invalidate_headers():
+    with _lock:
+        _headers.clear()
+        _absent.clear()
+
+def _to_rows(worksheet, rows: list) -> list[list]:
+    """
+    Lay out rows for the sheet: dict rows ({header: value}) are placed by
+    the current header row, list rows are passed through. A dict key the
+    cached headers do not know (a column was added or renamed) drops the
+    cache and re-reads row 1 once; keys still unknown are left out and
+    remembered, so they cost no further read until the headers expire.
+    """
+    if not any(isinstance(r, dict) for r in rows):
+        return rows
+    headers = get_headers(worksheet)
+    keys = {k for r in rows if isinstance(r, dict) for k in r}
+    with _lock:
+        known_absent = _absent.get(worksheet.id, set())
+    if not keys <= set(headers) | known_absent:
+        invalidate_headers()
+        headers = get_headers(worksheet)
+        with _lock:
+            _absent[worksheet.id] = keys - set(headers)
+    return [
+        ["" if r.get(h) is None else str(r.get(h)) for h in headers] if isinstance(r, dict) else r
+        for r in rows
+    ]
 
 def fetch_df(worksheet):
     data = worksheet.get_all_values()
@@ -27,5 +146,325 @@ def fetch_df(worksheet):
         return pd.DataFrame(columns=data[0])
 
 def append_rows(worksheet, rows):
-    # rows: list of lists
-    worksheet.append_rows(rows)
+    # rows: list of lists; returns the API response (incl. updatedRange)
+    return worksheet.append_rows(rows)
+
+# -----------------------------
+# WRITE-BEHIND APPEND QUEUE
+# -----------------------------
+# Rows from every session are persisted to a local SQLite file and
+# flushed by one background thread in coalesced append_rows calls.
+# Rate limits (429), server errors (5xx) and transport failures are
+# retried with exponential backoff; any other error (400/403/404, bad
+# rows) moves the batch to a dead-letter table so it cannot block the
+# rows queued behind it. Rows left over from a restart are flushed once
+# the writer starts again.
+_queue_lock = threading.Lock()
+_queue_wakeup = threading.Event()
+_writer = None
+_stats = {
+    "flushed_rows": 0,
+    "last_flush_rows": 0,
+    "last_flush_latency": None,  # seconds
+    "last_error": None,
+    "retry_in": 0,
+    "last_sync": None,  # inserted / updated / unchanged of the last sync flush
+}
+
+# Each queued row carries an optional post id and a mode: "append" adds
+# it as a new sheet row (recording the id in the sync index), "sync"
+# upserts it by id through sync_rows.
+_QUEUE_COLUMNS = {"post_id": "TEXT", "mode": "TEXT NOT NULL DEFAULT 'append'"}
+
+def _queue_db() -> sqlite3.Connection:
+    QUEUE_PATH.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(QUEUE_PATH, timeout=10)
+    conn.execute("CREATE TABLE IF NOT EXISTS pending (id INTEGER PRIMARY KEY, row TEXT NOT NULL)")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS dead ("
+        " id INTEGER PRIMARY KEY, row TEXT NOT NULL, error TEXT NOT NULL, failed_at REAL NOT NULL)"
+    )
+    for table in ("pending", "dead"):  # queue files from before post ids
+        have = {c[1] for c in conn.execute(f"PRAGMA table_info({table})")}
+        for name, decl in _QUEUE_COLUMNS.items():
+            if name not in have:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {decl}")
+    return conn
+
+def _is_retryable(exc: Exception) -> bool:
+    if isinstance(exc, (TransportError, Timeout)):
+        return True
+    status = getattr(getattr(exc, "response", None), "status_code", None)
+    return status == 429 or (status is not None and status >= 500)
+
+def _dead_letter(pending: list[tuple], error: str) -> None:
+    with _queue_lock:
+        conn = _queue_db()
+        try:
+            with conn:
+                conn.executemany(
+                    "INSERT INTO dead (id, row, post_id, mode, error, failed_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    [(i, row, post_id, mode, error, time.time()) for i, row, post_id, mode in pending],
+                )
+                conn.executemany("DELETE FROM pending WHERE id = ?", [(p[0],) for p in pending])
+        finally:
+            conn.close()
+
+def _start_writer():
+    global _writer
+    with _queue_lock:
+        if _writer is None or not _writer.is_alive():
+            _writer = threading.Thread(target=_writer_loop, name="sheet-writer", daemon=True)
+            _writer.start()
+
+def _writer_loop():
+    backoff = 1
+    while True:
+        _queue_wakeup.wait(timeout=5)
+        _queue_wakeup.clear()
+        time.sleep(QUEUE_COALESCE)
+        while True:
+            with _queue_lock:
+                conn = _queue_db()
+                try:
+                    pending = conn.execute(
+                        "SELECT id, row, post_id, mode FROM pending ORDER BY id LIMIT ?",
+                        (QUEUE_MAX_BATCH,)
+                    ).fetchall()
+                finally:
+                    conn.close()
+            if not pending:
+                break
+            # one write per flush: the leading run of rows with the same mode
+            mode = pending[0][3]
+            run = next((n for n, p in enumerate(pending) if p[3] != mode), len(pending))
+            pending = pending[:run]
+
+            started = time.monotonic()
+            try:
+                keyed = [(post_id, json.loads(row)) for _, row, post_id, _ in pending]
+                counts = sync_rows(get_worksheet(), keyed, append_only=(mode != "sync"))
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+                _stats["last_error"] = error
+                if not _is_retryable(e):
+                    # permanent: park the batch, re-open the tab and
+                    # re-read headers for the next one
+                    _dead_letter(pending, error)
+                    reset_worksheet()
+                    _stats["retry_in"] = 0
+                    continue
+                _stats["retry_in"] = backoff
+                time.sleep(backoff)
+                backoff = min(backoff * 2, QUEUE_MAX_BACKOFF)
+                continue
+
+            with _queue_lock:
+                conn = _queue_db()
+                try:
+                    with conn:
+                        conn.executemany("DELETE FROM pending WHERE id = ?", [(p[0],) for p in pending])
+                finally:
+                    conn.close()
+            backoff = 1
+            if mode == "sync":
+                _stats["last_sync"] = counts
+            _stats.update({
+                "flushed_rows": _stats["flushed_rows"] + len(pending),
+                "last_flush_rows": len(pending),
+                "last_flush_latency": time.monotonic() - started,
+                "last_error": None,
+                "retry_in": 0,
+            })
+
+def enqueue_rows(rows, post_ids: list[str] | None = None, sync: bool = False) -> int:
+    """
+    Persist rows for a background write and return immediately.
+    A row is a list of cell values, or a {header: value} dict that is
+    laid out by the sheet's header row when it is written.
+    With `post_ids`, appended rows are recorded in the sync index; with
+    `sync`, rows are upserted by post id (see sync_rows) instead of
+    appended.
+    Returns the queue depth after enqueueing.
+    """
+    if sync and post_ids is None:
+        raise ValueError("sync needs post_ids")
+    post_ids = post_ids or [None] * len(rows)
+    mode = "sync" if sync else "append"
+    with _queue_lock:
+        conn = _queue_db()
+        try:
+            with conn:
+                conn.executemany(
+                    "INSERT INTO pending (row, post_id, mode) VALUES (?, ?, ?)",
+                    [(json.dumps(r if isinstance(r, dict) else list(r), ensure_ascii=False),
+                      post_id, mode)
+                     for r, post_id in zip(rows, post_ids)],
+                )
+            (depth,) = conn.execute("SELECT COUNT(*) FROM pending").fetchone()
+        finally:
+            conn.close()
+    _start_writer()
+    _queue_wakeup.set()
+    return depth
+
+def queue_stats() -> dict:
+    """
+    Queue depth, dead-lettered row count and the writer's flush counters.
+    Also (re)starts the writer, so rows persisted before a restart get
+    flushed.
+    """
+    _start_writer()
+    with _queue_lock:
+        conn = _queue_db()
+        try:
+            (depth,) = conn.execute("SELECT COUNT(*) FROM pending").fetchone()
+            (dead,) = conn.execute("SELECT COUNT(*) FROM dead").fetchone()
+        finally:
+            conn.close()
+    return {"depth": depth, "dead": dead, **_stats}
+
+def dead_rows() -> list[dict]:
+    """
+    Dead-lettered rows with the error that parked them, oldest first.
+    """
+    with _queue_lock:
+        conn = _queue_db()
+        try:
+            return [
+                {"id": i, "row": json.loads(row), "error": error, "failed_at": failed_at}
+                for i, row, error, failed_at in conn.execute(
+                    "SELECT id, row, error, failed_at FROM dead ORDER BY id"
+                )
+            ]
+        finally:
+            conn.close()
+
+def requeue_dead() -> int:
+    """
+    Move every dead-lettered row back to the queue (e.g. after fixing
+    the sheet's permissions). Returns the number of rows moved.
+    """
+    with _queue_lock:
+        conn = _queue_db()
+        try:
+            with conn:
+                n = conn.execute(
+                    "INSERT INTO pending (id, row, post_id, mode) SELECT id, row, post_id, mode FROM dead"
+                ).rowcount
+                conn.execute("DELETE FROM dead")
+        finally:
+            conn.close()
+    _start_writer()
+    _queue_wakeup.set()
+    return n
+
+# -----------------------------
+# DELTA SYNC
+# -----------------------------
+# A local index maps each post id to the sheet row it was written to and
+# the values last sent. A sync appends only unseen posts and rewrites
+# only the changed cells of known ones in one batch_update, so traffic
+# scales with the edit, not with the post count. Rows deleted or
+# reordered by hand in the sheet are not detected.
+_sync_lock = threading.Lock()
+
+def _sync_db() -> sqlite3.Connection:
+    SYNC_INDEX_PATH.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(SYNC_INDEX_PATH, timeout=10)
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS synced ("
+        " sheet_id TEXT, post_id TEXT, sheet_row INTEGER NOT NULL, row TEXT NOT NULL,"
+        " PRIMARY KEY (sheet_id, post_id))"
+    )
+    return conn
+
+def _first_row(updated_range: str) -> int:
+    # e.g. "'Sheet-1'!A12:C14" -> 12
+    return int(re.search(r"![A-Z]+(\d+)", updated_range).group(1))
+
+def _changed_ranges(sheet_row: int, old: list, new: list) -> list[dict]:
+    """
+    One A1 range per run of consecutive changed cells in a row.
+    """
+    width = max(len(old), len(new))
+    old = [str(v) for v in old] + [""] * (width - len(old))
+    new = [str(v) for v in new] + [""] * (width - len(new))
+    ranges, col = [], 0
+    while col < width:
+        if old[col] == new[col]:
+            col += 1
+            continue
+        start = col
+        while col < width and old[col] != new[col]:
+            col += 1
+        ranges.append({
+            "range": f"{rowcol_to_a1(sheet_row, start + 1)}:{rowcol_to_a1(sheet_row, col)}",
+            "values": [new[start:col]],
+        })
+    return ranges
+
+def sync_rows(
+    worksheet,
+    keyed_rows: list[tuple[str | None, list | dict]],
+    append_only: bool = False
+) -> dict:
+    """
+    Upsert (post_id, row) pairs: unseen ids are appended in one call,
+    known ids get only their changed cells rewritten in one batch_update.
+    With `append_only`, every row is appended (and its id, if any,
+    pointed at the new row). Rows may be lists or {header: value} dicts
+    (see _to_rows). Runs on the caller's thread with no retry; the
+    sheet view goes through enqueue_rows(..., sync=True) instead.
+    Returns counts of inserted / updated / unchanged rows.
+    """
+    sheet_id = f"{worksheet.spreadsheet_id}:{worksheet.id}"
+    if not append_only:
+        keyed_rows = list(dict(keyed_rows).items())  # last edit of a post wins
+    rows = _to_rows(worksheet, [row for _, row in keyed_rows])
+    keyed_rows = [(post_id, row) for (post_id, _), row in zip(keyed_rows, rows)]
+    with _sync_lock:
+        conn = _sync_db()
+        try:
+            known = {
+                post_id: (sheet_row, json.loads(row))
+                for post_id, sheet_row, row in conn.execute(
+                    "SELECT post_id, sheet_row, row FROM synced WHERE sheet_id = ?", (sheet_id,)
+                )
+            }
+
+            inserts, updates, unchanged = [], [], 0
+            for post_id, row in keyed_rows:
+                row = [str(v) for v in row]
+                if append_only or post_id not in known:
+                    inserts.append((post_id, row))
+                elif known[post_id][1] != row:
+                    sheet_row, old = known[post_id]
+                    updates.append((post_id, sheet_row, row, _changed_ranges(sheet_row, old, row)))
+                else:
+                    unchanged += 1
+
+            written = []
+            try:
+                if updates:
+                    worksheet.batch_update([r for *_, ranges in updates for r in ranges])
+                    written += [(post_id, sheet_row, row) for post_id, sheet_row, row, _ in updates]
+                if inserts:
+                    resp = append_rows(worksheet, [row for _, row in inserts])
+                    first = _first_row(resp["updates"]["updatedRange"])
+                    written += [(post_id, first + i, row) for i, (post_id, row) in enumerate(inserts)]
+            except Exception:
+                invalidate_headers()  # a column change may be why it failed
+                raise
+
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO synced VALUES (?, ?, ?, ?)",
+                    [(sheet_id, post_id, sheet_row, json.dumps(row, ensure_ascii=False))
+                     for post_id, sheet_row, row in written if post_id is not None],
+                )
+        finally:
+            conn.close()
+
+    return {"inserted": len(inserts), "updated": len(updates), "unchanged": unchanged}
@@ -1,7 +1,31 @@
 import json
-import pandas as pd
+import os
+import threading
 from pathlib import Path
-from utils import chunk_json
+from typing import Iterator
+from utils import chunk_records
+
+try:
+    import ijson
+except ImportError:  # optional: fall back to a full json.load
+    ijson = None
+
+def iter_records(path: str) -> Iterator[dict]:
+    """
+    Yield the records of a JSON dump one at a time.
+    `.jsonl`/`.ndjson` files are read line by line; JSON arrays are
+    streamed with ijson when it is installed.
+    """
+    path = Path(path)
+    with path.open("rb") as f:
+        if path.suffix in (".jsonl", ".ndjson"):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        elif ijson is not None:
+            yield from ijson.items(f, "item", use_float=True)
+        else:
+            yield from json.load(f)
 
 def load_data(
     elearning_source: str,
@@ -9,29 +33,42 @@ def load_data(
     matches_source: str
 ):
     """
-    Load three JSON files dumped from Colab (e-learning, schedule, next matches)
-    into DataFrames, convert to JSON strings, and chunk them.
-    Returns (ele_chunks, sch_chunks, match_chunks).
+    Stream three JSON files dumped from Colab (e-learning, schedule,
+    next matches) straight into token-budgeted JSON-array chunks of
+    whole records.
+    Returns (ele_chunks, sch_chunks, match_chunks), each a list of
+    (chunk_text, n_tokens) pairs.
     """
+    ele_chunks   = list(chunk_records(iter_records(elearning_source)))
+    sch_chunks   = list(chunk_records(iter_records(schedule_source)))
+    match_chunks = list(chunk_records(iter_records(matches_source)))
 
-    def load_json(path: str) -> pd.DataFrame:
-        path = Path(path)
-        data = json.loads(path.read_text(encoding="utf-8"))
-        return pd.DataFrame(data)
+    return ele_chunks, sch_chunks, match_chunks
 
-    # Load each DataFrame
-    df_ele     = load_json(elearning_source)
-    df_sch     = load_json(schedule_source)
-    df_matches = load_json(matches_source)
 
-    # Convert DataFrames back to pretty JSON strings
-    ele_json     = df_ele.to_json(orient="records", force_ascii=False, indent=2)
-    sch_json     = df_sch.to_json(orient="records", force_ascii=False, indent=2)
-    matches_json = df_matches.to_json(orient="records", force_ascii=False, indent=2)
+# ─── Process-wide shared loader ───────────────────────────────────
+# One parsed + chunked copy of each source per process, shared by every
+# session and rerun, refreshed only when the file's (mtime, size)
+# signature changes.
+_shared: dict[str, tuple[tuple[int, int], tuple]] = {}
+_shared_lock = threading.Lock()
 
-    # Chunk each JSON string
-    ele_chunks     = chunk_json(ele_json)
-    sch_chunks     = chunk_json(sch_json)
-    match_chunks   = chunk_json(matches_json)
+def _signature(path: str) -> tuple[int, int]:
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
 
-    return ele_chunks, sch_chunks, match_chunks
+def load_chunks_cached(source: str) -> tuple:
+    """
+    The (chunk_text, n_tokens) pairs of one JSON dump, served from a
+    process-wide cache. The returned tuple is shared; treat it as
+    read-only.
+    """
+    sig = _signature(source)
+    with _shared_lock:
+        hit = _shared.get(source)
+        if hit is not None and hit[0] == sig:
+            return hit[1]
+
+        chunks = tuple(chunk_records(iter_records(source)))
+        _shared[source] = (sig, chunks)
+        return chunks
@@ -1,13 +1,16 @@
 import os
+import json
 from pathlib import Path
 from dotenv import load_dotenv
 import streamlit as st
-from datetime import date
 
-from sheets import load_data
+from sheets import load_chunks_cached
 from example_posts import example_posts_json
-from openai_client import chat_conversation
-from utils import chunk_json
+from openai_client import chat_conversation_stream
+from utils import chunk_records
+from prompt_layout import system_block
+from retrieval import retrieve
+from config import CONTEXT_TOP_K, CONTEXT_TOKEN_BUDGET
 
 import prompts
 
@@ -44,39 +47,38 @@ button[data-baseweb="button"]:hover {
 """, unsafe_allow_html=True)
 
 # ─── Load & chunk sheets & matches ─────────────────────────────────
-ele_chunks, sch_chunks, match_chunks = load_data(
-    ELEARNING_SOURCE,
-    SCHEDULE_SOURCE,
-    MATCHES_SOURCE
-)
-example_chunks = chunk_json(example_posts_json)
+match_chunks = load_chunks_cached(MATCHES_SOURCE)
+example_chunks = list(chunk_records(json.loads(example_posts_json)))
 
 # ─── Session‐state init ───────────────────────────────────────────
+streamed = False  # set when this run already rendered the reply live
+
 if "messages" not in st.session_state:
-    # 1) Base system prompts
-    base = [
-        {"role":"system","content":prompts.system_prompt},
-        {"role":"system","content":f"Today is {date.today():%Y-%m-%d}."}
-    ]
+    # 1) Base system block in the cache-stable prompt_layout order:
+    #    prompt, examples, then data; the date is sent per call
+    sections = {}
+    if USE_EXAMPLES:
+        sections["<EXAMPLE_POSTS>"] = example_chunks
 
-    # 2) Optionally inject schedule and e-learning
+    # 2) Optionally inject the schedule and e-learning records that
+    #    match the upcoming matches (BM25, top-k within a token budget)
     if USE_CONTEXT:
-        for c in sch_chunks:
-            base.append({"role":"system","content":f"<SCHEDULE_DATA>\n{c}"})
-        for c in ele_chunks:
-            base.append({"role":"system","content":f"<ELEARNING_DATA>\n{c}"})
+        query = "\n".join(text for text, _ in match_chunks)
+        sections["<SCHEDULE_DATA>"]  = retrieve(
+            SCHEDULE_SOURCE, query, CONTEXT_TOP_K, CONTEXT_TOKEN_BUDGET
+        )
+        sections["<ELEARNING_DATA>"] = retrieve(
+            ELEARNING_SOURCE, query, CONTEXT_TOP_K, CONTEXT_TOKEN_BUDGET
+        )
 
-    # 3) Optionally inject example posts
-    if USE_EXAMPLES:
-        for c in example_chunks:
-            base.append({"role":"system","content":f"<EXAMPLE_POSTS>\n{c}"})
+    base = system_block(prompts.system_prompt, sections)
 
     st.session_state.messages   = base
     st.session_state.processing = False
     st.session_state.last_reply = None
 
     # ─── Automatic first user‐prompt ───────────────────────────────
-    all_matches_json = "\n".join(match_chunks) 
+    all_matches_json = "\n".join(text for text, _ in match_chunks)
     initial_payload = (
         prompts.prompt_text
         + "\n\n<NEXT_MATCHES_JSON>\n"
@@ -85,13 +87,14 @@ if "messages" not in st.session_state:
     )
     st.session_state.messages.append({"role": "user", "content": initial_payload})
 
-    # call the model and record its reply
-    with st.spinner("PoloGPT is thinking…"):
-        first_reply = chat_conversation(
-            st.session_state.messages,
-            model="gpt-4.1-mini",
-            token_threshold=TOKEN_THRESHOLD
-        )
+    # call the model, streaming its reply, and record it
+    st.markdown("**PoloGPT:**")
+    first_reply = st.write_stream(chat_conversation_stream(
+        st.session_state.messages,
+        model="gpt-4.1-mini",
+        token_threshold=TOKEN_THRESHOLD
+    ))
+    streamed = True
     st.session_state.messages.append({"role": "assistant", "content": first_reply})
     st.session_state.last_reply = first_reply
     st.session_state.processing = False
@@ -116,19 +119,20 @@ send = st.button(
 # ─── On Send ───────────────────────────────────────────────────────
 if send and user_input.strip():
     st.session_state.processing = True
-    with st.spinner("PoloGPT is thinking…"):
-        reply = chat_conversation(
-            st.session_state.messages + [{"role":"user","content":user_input}],
-            model="gpt-4.1-mini",
-            token_threshold=TOKEN_THRESHOLD
-        )
+    st.markdown("**PoloGPT:**")
+    reply = st.write_stream(chat_conversation_stream(
+        st.session_state.messages + [{"role":"user","content":user_input}],
+        model="gpt-4.1-mini",
+        token_threshold=TOKEN_THRESHOLD
+    ))
+    streamed = True
     # record
     st.session_state.messages.append({"role":"user","content":user_input})
     st.session_state.messages.append({"role":"assistant","content":reply})
     st.session_state.last_reply = reply
     st.session_state.processing = False
 
-# ─── Always show last reply ────────────────────────────────────────
-if st.session_state.last_reply:
+# ─── Always show last reply (unless it was just streamed) ─────────
+if st.session_state.last_reply and not streamed:
     st.markdown("**PoloGPT:**")
     st.write(st.session_state.last_reply)
@@ -0,0 +1,55 @@
+# tokens.py
+import hashlib
+import threading
+from functools import lru_cache
+
+import tiktoken
+
+# ─── Token ledger ─────────────────────────────────────────────────
+# Per-message token counts memoized by (model, content hash), so a
+# turn only tokenizes text that has not been seen before. The large
+# system chunks are shared by every session in the process.
+LEDGER_MAX_ENTRIES = 50_000
+
+_ledger: dict[tuple[str, str], int] = {}
+_ledger_lock = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def get_encoder(model: str) -> "tiktoken.Encoding":
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+
+
+def _key(text: str, model: str) -> tuple[str, str]:
+    digest = hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+    return model, digest
+
+
+def seed(text: str, model: str, n_tokens: int) -> None:
+    """
+    Record a token count computed elsewhere (e.g. by the chunker)
+    so it is never re-encoded.
+    """
+    key = _key(text, model)
+    with _ledger_lock:
+        if len(_ledger) >= LEDGER_MAX_ENTRIES:
+            _ledger.clear()
+        _ledger[key] = n_tokens
+
+
+def count_text(text: str, model: str) -> int:
+    key = _key(text, model)
+    with _ledger_lock:
+        hit = _ledger.get(key)
+    if hit is not None:
+        return hit
+    n = len(get_encoder(model).encode(text))
+    seed(text, model, n)
+    return n
+
+
+def count_messages(messages: list[dict], model: str) -> int:
+    return sum(count_text(m["content"], model) for m in messages)
@@ -1,7 +1,17 @@
 # ui/chat_ui.py
 import streamlit as st
+from openai_client import get_last_usage
 
-def chat_interface(history, token_threshold):
+def usage_caption():
+    # how much of the last prompt the provider served from its cache
+    usage = get_last_usage()
+    if usage:
+        st.caption(
+            f"Prompt: {usage['prompt_tokens']:,} tokens "
+            f"({usage['cached_tokens']:,} cached, {usage['uncached_tokens']:,} uncached)"
+        )
+
+def chat_interface(history, token_threshold, structured=False):
     st.title("🏇 PoloGPT Chatbot")
     st.write("Type your message ...")
 
@@ -10,8 +20,22 @@ def chat_interface(history, token_threshold):
 
     if send and user_input.strip():
         st.session_state.processing = True
-        from chat_flow import ask_model
-        with st.spinner("PoloGPT is thinking…"):
-            reply = ask_model(history, user_input.strip(), token_threshold=token_threshold)
+        from chat_flow import ask_model_stream, ask_model_posts_stream
+        from ui.sheet_ui import stream_posts_table
+        st.markdown("**PoloGPT:**")
+        if structured:
+            # typed posts fill the table as they close in the stream and
+            # go straight to the sheet view; no text to parse
+            st.session_state.last_posts = stream_posts_table(
+                ask_model_posts_stream(history, user_input.strip(), token_threshold=token_threshold)
+            )
+            reply = history[-1]["content"]
+        else:
+            # render tokens as they arrive; write_stream returns the full text
+            reply = st.write_stream(
+                ask_model_stream(history, user_input.strip(), token_threshold=token_threshold)
+            )
+            st.session_state.last_posts = None
         st.session_state.last_reply = reply
         st.session_state.processing = False
+        usage_caption()
@@ -1,19 +1,41 @@
 # ui/sheet_ui.py
 import json
+import hashlib
 import pandas as pd
 import streamlit as st
-from sheet_client import get_worksheet, fetch_df, append_rows
+from posts import POST_FIELDS
+from sheet_client import enqueue_rows, queue_stats, dead_rows, requeue_dead
 
-def sheet_interface(last_reply):
-    # parse JSON
-    try:
-        loaded = json.loads(last_reply)
-        parse_err = None
-    except Exception as e:
-        loaded = None
-        parse_err = str(e)
+def stream_posts_table(post_stream) -> list:
+    """
+    Fill a read-only table post by post from (position, Post) pairs
+    while they are generated; returns the posts in position order.
+    The editable table is rendered by sheet_interface once complete.
+    """
+    placeholder = st.empty()
+    received = {}
+    for i, post in post_stream:
+        received[i] = post
+        placeholder.dataframe(
+            pd.DataFrame([received[k].as_dict() for k in sorted(received)],
+                         columns=list(POST_FIELDS)),
+            use_container_width=True,
+        )
+    placeholder.empty()
+    return [received[k] for k in sorted(received)]
 
+def sheet_interface(last_reply, posts=None):
+    # typed posts (structured mode) need no parsing
+    loaded = None; parse_err = None
     df = None; norm_err = None
+    if posts is not None:
+        df = pd.DataFrame([p.as_dict() for p in posts], columns=list(POST_FIELDS))
+    else:
+        try:
+            loaded = json.loads(last_reply)
+        except Exception as e:
+            parse_err = str(e)
+
     if isinstance(loaded, list):
         try:
             df = pd.json_normalize(loaded)
@@ -36,22 +58,47 @@ def sheet_interface(last_reply):
         st.markdown("`" + str(loaded) + "`")
         edited = None
 
-    if st.button("Send to Google Sheet"):
-        ws = get_worksheet()
-        sheet_df = fetch_df(ws)
-        headers = sheet_df.columns.tolist()
+    sync = df is not None and st.toggle(
+        "Sync changes only", value=True,
+        help="Update posts already in the sheet instead of appending duplicates."
+    )
 
+    if st.button("Send to Google Sheet"):
+        # write-behind: persisted locally and written in the background
         if df is not None:
+            # stable per-post id: the reply it came from + its row position
+            reply_id = hashlib.sha1(last_reply.encode("utf-8")).hexdigest()[:12]
+            post_ids = [f"{reply_id}-{i}" for i in edited.index]
+            # {header: value} rows, laid out by the sheet's header row
+            # when written
             rows = (
-                edited.reindex(columns=headers, fill_value="")
-                      .fillna("").values.tolist()
+                edited.assign(**{"Post ID": post_ids})
+                      .fillna("").astype(str).to_dict("records")
             )
-        elif isinstance(loaded, list):
-            rows = [[str(item)] for item in loaded]
-            headers = [headers[0]]
+            depth = enqueue_rows(rows, post_ids, sync=sync)
+            verb = "sync" if sync else "append"
+            st.success(f"🎉 Queued {len(rows)} post(s) to {verb} ({depth} pending).")
         else:
-            rows = [[last_reply]]
-            headers = [headers[0]]
+            rows = [[str(item)] for item in loaded] if isinstance(loaded, list) else [[last_reply]]
+            depth = enqueue_rows(rows)
+            st.success(f"🎉 Queued {len(rows)} row(s) for the sheet ({depth} pending).")
 
-        append_rows(ws, rows)
-        st.success(f"🎉 Appended {len(rows)} row(s)!")
+    stats = queue_stats()
+    if stats["depth"] or stats["last_error"] or stats["dead"]:
+        latency = stats["last_flush_latency"]
+        st.caption(
+            f"Sheet queue: {stats['depth']} pending"
+            + (f" · last flush {stats['last_flush_rows']} row(s) in {latency:.2f}s" if latency else "")
+            + (f" · retrying in {stats['retry_in']}s ({stats['last_error']})" if stats["retry_in"] else "")
+        )
+    if stats["last_sync"]:
+        counts = stats["last_sync"]
+        st.caption(
+            f"Last sync: {counts['inserted']} new, {counts['updated']} updated, "
+            f"{counts['unchanged']} unchanged."
+        )
+    if stats["dead"]:
+        st.warning(f"{stats['dead']} row(s) could not be written: {dead_rows()[-1]['error']}")
+        if st.button("Retry failed rows"):
+            requeue_dead()
+            st.rerun()
@@ -1,7 +1,69 @@
 import json
+from typing import Iterable, Iterator
 
-def chunk_json(js: str, max_chars: int = 50_000) -> list[str]:
+import tokens
+
+MODEL            = "gpt-4.1-mini"
+CHUNK_MAX_TOKENS = 12_000  # ≈ the old 50k-char slices
+
+def chunk_json(
+    js: str,
+    max_tokens: int = CHUNK_MAX_TOKENS,
+    model: str = MODEL
+) -> list[str]:
+    """
+    Split a big JSON array string into chunks of whole records,
+    each ≤ max_tokens for `model`.
+    """
+    return [text for text, _ in chunk_records(json.loads(js), max_tokens, model)]
+
+def chunk_records(
+    records: Iterable[dict],
+    max_tokens: int = CHUNK_MAX_TOKENS,
+    model: str = MODEL
+) -> Iterator[tuple[str, int]]:
+    """
+    Pack whole records into compact JSON arrays of ≤ max_tokens each
+    (a single oversized record gets a chunk of its own).
+    Yields (chunk_text, n_tokens); the counts are also seeded into the
+    token ledger. Consumes `records` lazily, so only one chunk is held
+    at a time.
+    """
+    enc = tokens.get_encoder(model)
+    brackets = len(enc.encode("[]"))
+    comma = len(enc.encode(","))
+
+    parts, used = [], brackets
+    for rec in records:
+        text = json.dumps(rec, ensure_ascii=False, separators=(",", ":"))
+        n = len(enc.encode(text))
+        if parts and used + comma + n > max_tokens:
+            yield _emit(parts, used, model)
+            parts, used = [], brackets
+        used += n + (comma if parts else 0)
+        parts.append(text)
+    if parts:
+        yield _emit(parts, used, model)
+
+def _emit(parts: list[str], n_tokens: int, model: str) -> tuple[str, int]:
+    text = "[" + ",".join(parts) + "]"
+    tokens.seed(text, model, n_tokens)
+    return text, n_tokens
+
+def tagged_messages(
+    tag: str,
+    chunks: Iterable[tuple[str, int]],
+    model: str = MODEL
+) -> list[dict]:
     """
-    Split a big JSON string into chunks each ≤ max_chars long.
+    Wrap (chunk_text, n_tokens) pairs into `<TAG>\\n…` system messages,
+    seeding the ledger so the threshold check never re-encodes them.
     """
-    return [js[i : i + max_chars] for i in range(0, len(js), max_chars)]
+    header = f"{tag}\n"
+    n_header = tokens.count_text(header, model)
+    msgs = []
+    for text, n in chunks:
+        content = header + text
+        tokens.seed(content, model, n_header + n)
+        msgs.append({"role":"system","content":content})
+    return msgs